@@ -1,15 +1,40 @@
-import requests
-import pandas as pd
 import time
 import re
 import os
+import sys
+import argparse
 import getpass
-from collections import Counter
+import threading
+import random
+import json
+import sqlite3
+import hashlib
+import unicodedata
+import gzip
+import numbers
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import chain
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from tmc_cron import (
+    AFFLUENCE_DAYS, WEEKDAYS, classify_schedule, cron_fire_profile, hour_from_cron, parse_cron,
+    readable_cron, translate_main, week_start,
+)
+
+# pandas, numpy, requests et openpyxl sont importés dans les fonctions qui
+# s'en servent : `translate` et l'import du module restent instantanés.
 
 # =============================
 # ⚙️ CONFIGURATION
 # =============================
 BASE = "https://api.eu.cloud.talend.com"
+OFFLINE = os.environ.get("TMC_OFFLINE", "") == "1"          # reconstruit les exports depuis le cache uniquement
 
 def _load_token():
     """Charge le token depuis la variable d'env TMC_TOKEN, un fichier .env, ou la saisie interactive."""
@@ -29,27 +54,408 @@ def _load_token():
                     if token:
                         return token
 
-    # 3. Saisie interactive (masquée)
+    # 3. Mode hors-ligne : aucun appel API, pas besoin de token
+    if OFFLINE:
+        return ""
+
+    # 4. Saisie interactive (masquée) — impossible en cron / CI
+    if not sys.stdin.isatty():
+        raise SystemExit("❌ Token TMC non trouvé dans TMC_TOKEN ou .env (exécution non interactive).")
     print("⚠️  Token TMC non trouvé dans TMC_TOKEN ou .env")
     token = getpass.getpass("🔑 Entre ton token Talend Cloud (Bearer) : ").strip()
     if not token:
         raise SystemExit("❌ Token vide — arrêt du script.")
     return token
 
-TOKEN = _load_token()
-HEADERS = {"Authorization": f"Bearer {TOKEN}", "Content-Type": "application/json"}
+TOKEN = None  # chargé au premier appel API, jamais à l'import
+
+
+def _headers():
+    global TOKEN
+    if TOKEN is None:
+        TOKEN = _load_token()
+    return {"Authorization": f"Bearer {TOKEN}", "Content-Type": "application/json"}
+
+
+PAGE_SIZE = 100
+MAX_WORKERS = int(os.environ.get("TMC_CONCURRENCY", "8"))   # requêtes simultanées max
+RATE_LIMIT = float(os.environ.get("TMC_RATE_LIMIT", "10"))  # requêtes / seconde (0 = illimité)
+MAX_RETRIES = int(os.environ.get("TMC_MAX_RETRIES", "5"))
+HTTP_TIMEOUT = (10, 60)                                     # (connexion, lecture) en secondes
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE, BACKOFF_MAX = 1.0, 60.0
+RETRY_AFTER_MAX = float(os.environ.get("TMC_RETRY_AFTER_MAX", "3600"))  # attente max demandée par Retry-After (s)
+
+CACHE_PATH = os.environ.get("TMC_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tmc_cache.sqlite"))
+CACHE_TTL = int(os.environ.get("TMC_CACHE_TTL", "0"))       # secondes sans revalidation (0 = GET conditionnel à chaque run)
+CACHE_TTLS = {                                              # réponses figées, jamais revalidées pendant cette durée
+    "/processing/executables": 24 * 3600,                   # historique borné à minuit : figé sur la journée
+}
 
 
 # =============================
 # 🧰 HTTP UTIL
 # =============================
+class TokenBucket:
+    """Limiteur de débit : `rate` requêtes par seconde, rafales jusqu'à `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def defer(self, seconds):
+        """Suspend la délivrance de jetons pendant `seconds` (ex. Retry-After)."""
+        with self.lock:
+            self.tokens = 0
+            self.updated = max(self.updated, time.monotonic() + seconds)
+
+
+RATE_LIMITER = TokenBucket(RATE_LIMIT)
+_IN_FLIGHT = threading.BoundedSemaphore(MAX_WORKERS)
+
+
+def configure_fetch(concurrency=None, rate=None):
+    """Ajuste la concurrence et le débit des appels API pour le run."""
+    global MAX_WORKERS, RATE_LIMITER, _IN_FLIGHT
+    if concurrency:
+        MAX_WORKERS = max(1, int(concurrency))
+        _IN_FLIGHT = threading.BoundedSemaphore(MAX_WORKERS)
+    if rate is not None:
+        RATE_LIMITER = TokenBucket(float(rate))
+
+
+# =============================
+# 📏 INSTRUMENTATION
+# =============================
+REPORT_FILE = os.environ.get("TMC_REPORT", "")    # rapport JSON du run (vide = aucun)
+PROFILE_FILE = os.environ.get("TMC_PROFILE", "")  # statistiques cProfile (vide = aucun)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_RE_ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-fA-F-]{16,})$")
+
+
+def _endpoint(url):
+    """Chemin de l'URL, identifiants remplacés par {id} (une entrée par endpoint, pas par ressource)."""
+    path = urlsplit(url).path
+    return "/".join("{id}" if _RE_ID_SEGMENT.match(seg) else seg for seg in path.split("/"))
+
+
+class RunMetrics:
+    """Métriques d'un run, alimentées depuis tous les threads.
+
+    - phases : nombre et durée cumulée de chaque étape (build_dataframe, export…) ;
+    - endpoints : requêtes, statuts, reprises, octets, cache, histogramme de latence ;
+    - fetches : pages, éléments et durée de chaque pagination fetch_*.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.phases = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+        self.endpoints = {}
+        self.fetches = []
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self.lock:
+                self.phases[name]["count"] += 1
+                self.phases[name]["seconds"] += elapsed
+
+    def _endpoint_stats(self, url):
+        return self.endpoints.setdefault(_endpoint(url), {
+            "requests": 0, "cache_hits": 0, "not_modified": 0, "retries": 0, "errors": 0,
+            "bytes": 0, "seconds": 0.0, "max_seconds": 0.0, "statuses": Counter(),
+            "latency": [0] * (len(LATENCY_BUCKETS) + 1),
+        })
+
+    def request(self, url, status, seconds, nbytes=0):
+        """Une tentative HTTP (status = code HTTP, ou nom de l'exception réseau)."""
+        with self.lock:
+            stats = self._endpoint_stats(url)
+            stats["requests"] += 1
+            stats["statuses"][str(status)] += 1
+            stats["bytes"] += nbytes
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["latency"][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            if status == 304:
+                stats["not_modified"] += 1
+
+    def count(self, url, field):
+        """Incrémente un compteur d'endpoint : cache_hits, retries ou errors."""
+        with self.lock:
+            self._endpoint_stats(url)[field] += 1
+
+    def fetch(self, path, params, pages, items, seconds):
+        with self.lock:
+            self.fetches.append({"path": path, "params": dict(params), "pages": pages,
+                                 "items": items, "seconds": round(seconds, 4)})
+
+    def report(self, **extra):
+        """Rapport JSON-sérialisable du run."""
+        labels = [f"<={b}s" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        with self.lock:
+            endpoints = {}
+            for name, stats in sorted(self.endpoints.items()):
+                requests_ = stats["requests"]
+                endpoints[name] = {
+                    **{k: stats[k] for k in ("requests", "cache_hits", "not_modified", "retries", "errors", "bytes")},
+                    "statuses": dict(stats["statuses"]),
+                    "mean_seconds": round(stats["seconds"] / requests_, 4) if requests_ else None,
+                    "max_seconds": round(stats["max_seconds"], 4),
+                    "latency_histogram": dict(zip(labels, stats["latency"])),
+                }
+            return {
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "duration_seconds": round(time.time() - self.started, 3),
+                **extra,
+                "phases": {k: {"count": v["count"], "seconds": round(v["seconds"], 4)}
+                           for k, v in sorted(self.phases.items(), key=lambda kv: -kv[1]["seconds"])},
+                "endpoints": endpoints,
+                "fetches": list(self.fetches),
+                "caches": {f.__name__: f.cache_info()._asdict() for f in (
+                    readable_cron, classify_schedule, hour_from_cron, parse_cron, cron_fire_profile,
+                    week_fire_minutes)},
+            }
+
+    def write(self, path, **extra):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**extra), f, ensure_ascii=False, indent=2)
+        print(f"📏 Rapport d'exécution : {path}")
+
+
+METRICS = RunMetrics()
+_PROFILERS = None  # profils cProfile des threads de traitement (liste active avec --profile)
+
+
+def _profiled(fn):
+    """Exécute `fn` sous un cProfile propre au thread quand le profilage est actif.
+
+    Avant Python 3.12, cProfile ne suit que le thread qui l'a démarré : chaque
+    workspace traité dans le pool a donc son profil, fusionné au profil principal
+    en fin de run. Depuis 3.12, un seul profileur peut être actif et le profil
+    principal voit déjà tous les threads.
+    """
+    if _PROFILERS is None or sys.version_info >= (3, 12):
+        return fn
+
+    def wrapper(*args, **kwargs):
+        import cProfile
+        profiler = cProfile.Profile()
+        _PROFILERS.append(profiler)
+        return profiler.runcall(fn, *args, **kwargs)
+    return wrapper
+
+
+# =============================
+# 💽 CACHE DISQUE
+# =============================
+class ResponseCache:
+    """Cache SQLite des réponses GET : corps JSON, ETag, Last-Modified et date de lecture."""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, body TEXT, etag TEXT, last_modified TEXT, fetched_at REAL)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT)")
+
+    def get(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"data": json.loads(row[0]), "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+
+    def put(self, url, data, etag=None, last_modified=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (url, json.dumps(data), etag, last_modified, time.time()),
+            )
+
+    def touch(self, url):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def get_value(self, key):
+        """Valeur JSON calculée lors d'un run précédent (table clé/valeur)."""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_value(self, key, value):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?)", (key, json.dumps(value)))
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def configure_cache(path=None, ttl=None, offline=None):
+    """Change l'emplacement (None/"" = désactivé), le TTL ou le mode hors-ligne du cache."""
+    global CACHE_PATH, CACHE_TTL, OFFLINE, _CACHE
+    if path is not None:
+        CACHE_PATH, _CACHE = path, None
+    if ttl is not None:
+        CACHE_TTL = int(ttl)
+    if offline is not None:
+        OFFLINE = bool(offline)
+
+
+def _cache():
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None and CACHE_PATH:
+            _CACHE = ResponseCache(CACHE_PATH)
+        return _CACHE
+
+
+def _cache_ttl(url):
+    path = urlsplit(url).path
+    return next((ttl for prefix, ttl in CACHE_TTLS.items() if path.startswith(prefix)), CACHE_TTL)
+
+
+class TMCApiError(RuntimeError):
+    """Erreur API persistante malgré les reprises (429, 5xx, réseau)."""
+
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _session():
+    """Session HTTP keep-alive partagée, dimensionnée sur MAX_WORKERS."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(_headers())
+            _SESSION = session
+        return _SESSION
+
+
+def _retry_delay(resp, attempt):
+    """Délai avant reprise : Retry-After tel qu'envoyé (borné par RETRY_AFTER_MAX), sinon backoff exponentiel.
+
+    Un serveur qui limite le débit ralentit le run au lieu de faire perdre des
+    données : ses délais ne sont pas ramenés au plafond du backoff.
+    """
+    retry_after = resp.headers.get("Retry-After") if resp is not None else None
+    if retry_after:
+        try:
+            return min(RETRY_AFTER_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(retry_after)
+                return min(RETRY_AFTER_MAX, max(0.0, when.timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
 def http_get(url):
-    print(f"[GET] {url}")
-    resp = requests.get(url, headers=HEADERS)
-    if not resp.ok:
-        print(f"⚠️ {resp.status_code}: {resp.text}")
+    """GET JSON via la session partagée, avec limitation de débit et reprises.
+
+    Renvoie None sur une erreur client définitive (4xx hors 429). Lève
+    TMCApiError quand les reprises (429, 5xx, erreur réseau, corps 2xx
+    illisible) sont épuisées, afin qu'une pagination ne soit jamais tronquée
+    silencieusement.
+
+    Une réponse en cache est revalidée par If-None-Match / If-Modified-Since
+    (304 = inchangé, rien n'est retéléchargé) ; elle n'est servie sans
+    revalidation que pendant le TTL choisi (--cache-ttl, 0 par défaut) ou
+    pour l'historique d'exécution de la journée. En mode hors-ligne, seul le
+    cache est lu.
+    """
+    import requests
+    cache = _cache()
+    entry = cache.get(url) if cache else None
+    if entry and (OFFLINE or time.time() - entry["fetched_at"] < _cache_ttl(url)):
+        print(f"[CACHE] {url}")
+        METRICS.count(url, "cache_hits")
+        return entry["data"]
+    if OFFLINE:
+        print(f"⚠️ Hors-ligne : {url} absent du cache")
         return None
-    return resp.json()
+
+    conditional = {}
+    if entry and entry["etag"]:
+        conditional["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        conditional["If-Modified-Since"] = entry["last_modified"]
+
+    print(f"[GET] {url}")
+    for attempt in range(MAX_RETRIES + 1):
+        with _IN_FLIGHT:
+            RATE_LIMITER.acquire()
+            t0 = time.perf_counter()
+            try:
+                resp = _session().get(url, headers=conditional, timeout=HTTP_TIMEOUT)
+            except requests.RequestException as exc:  # réseau, timeout, réponse tronquée (IncompleteRead)
+                resp, error = None, f"{exc.__class__.__name__}: {exc}"
+                METRICS.request(url, exc.__class__.__name__, time.perf_counter() - t0)
+        if resp is not None:
+            METRICS.request(url, resp.status_code, time.perf_counter() - t0, len(resp.content))
+            if resp.status_code == 304 and entry:
+                cache.touch(url)
+                return entry["data"]
+            if resp.ok:
+                try:
+                    data = resp.json()
+                except ValueError as exc:  # corps 2xx tronqué ou non JSON : on relit
+                    error = f"{resp.status_code} illisible : {exc}"
+                else:
+                    if cache:
+                        cache.put(url, data, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+                    return data
+            elif resp.status_code not in RETRY_STATUSES:
+                print(f"⚠️ {resp.status_code}: {resp.text}")
+                METRICS.count(url, "errors")
+                return None
+            else:
+                error = f"{resp.status_code}: {resp.text[:200]}"
+        if attempt == MAX_RETRIES:
+            METRICS.count(url, "errors")
+            raise TMCApiError(f"Échec après {MAX_RETRIES} reprises sur {url} ({error})")
+        delay = _retry_delay(resp, attempt)
+        if resp is not None and resp.status_code == 429:
+            RATE_LIMITER.defer(delay)
+        print(f"⚠️ {error} — reprise {attempt + 1}/{MAX_RETRIES} dans {delay:.1f}s")
+        METRICS.count(url, "retries")
+        time.sleep(delay)
 
 
 # =============================
@@ -57,10 +463,7 @@ def http_get(url):
 # =============================
 def fetch_projects():
     print("\n🔍 Récupération des projets Talend Studio...")
-    data = http_get(f"{BASE}/orchestration/projects?limit=100")
-    if not data:
-        return {}
-    projects = data.get("items", []) if isinstance(data, dict) else data
+    projects = fetch_paginated("/orchestration/projects", {})
     project_map = {p["id"]: p.get("name") or p.get("technicalLabel") for p in projects if p.get("id")}
     print(f"✅ {len(projects)} projets détectés.")
     return project_map
@@ -71,10 +474,7 @@ def fetch_projects():
 # =============================
 def fetch_workspaces():
     print("\n🔍 Récupération des workspaces (v2.6 endpoint global)...")
-    ws_data = http_get(f"{BASE}/orchestration/workspaces?limit=200")
-    if not ws_data:
-        return []
-    ws_items = ws_data.get("items", []) if isinstance(ws_data, dict) else (ws_data or [])
+    ws_items = fetch_paginated("/orchestration/workspaces", {})
     workspaces = []
     for w in ws_items:
         env_info = w.get("environment", {})
@@ -88,23 +488,56 @@ def fetch_workspaces():
     return workspaces
 
 
+# =============================
+# 📑 PAGINATION CONCURRENTE
+# =============================
+def _page_items(data):
+    return (data or {}).get("items", []) if isinstance(data, dict) else (data or [])
+
+
+def fetch_paginated(path, params):
+    """Récupère toutes les pages d'un endpoint `limit`/`offset`.
+
+    La première page est lue seule ; si elle est pleine, les suivantes sont
+    demandées en parallèle : toutes d'un coup si l'API renvoie `total`, sinon
+    par lots de 1, 2, 4… pages (au plus MAX_WORKERS) jusqu'à la première page
+    incomplète, pour ne pas demander des pages vides sur les petits endpoints.
+    """
+    query = "".join(f"&{k}={v}" for k, v in params.items())
+
+    def get_page(offset):
+        return http_get(f"{BASE}{path}?limit={PAGE_SIZE}&offset={offset}{query}")
+
+    t0 = time.perf_counter()
+    first = get_page(0)
+    page = _page_items(first)
+    pages = 1
+    all_data = list(page)
+    total = first.get("total") if isinstance(first, dict) else None
+    offset, batch = PAGE_SIZE, 1
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        while len(page) == PAGE_SIZE:
+            if isinstance(total, int):
+                count = max(1, -(-(total - offset) // PAGE_SIZE))
+            else:
+                count, batch = batch, min(batch * 2, MAX_WORKERS)
+            offsets = [offset + i * PAGE_SIZE for i in range(count)]
+            pages += len(offsets)
+            for page in map(_page_items, pool.map(get_page, offsets)):
+                all_data.extend(page)
+                if len(page) < PAGE_SIZE:
+                    break
+            offset = offsets[-1] + PAGE_SIZE
+    METRICS.fetch(path, params, pages, len(all_data), time.perf_counter() - t0)
+    return all_data
+
+
 # =============================
 # ⏰ SCHEDULES
 # =============================
 def fetch_schedules(environment_id):
-    all_data, offset = [], 0
     print(f"\n🔄 Récupération des schedules ({environment_id})...")
-    while True:
-        url = f"{BASE}/orchestration/schedules?limit=100&offset={offset}&environmentId={environment_id}"
-        data = http_get(url)
-        items = (data or {}).get("items", []) if isinstance(data, dict) else (data or [])
-        if not items:
-            break
-        all_data.extend(items)
-        if len(items) < 100:
-            break
-        offset += 100
-        time.sleep(0.2)
+    all_data = fetch_paginated("/orchestration/schedules", {"environmentId": environment_id})
     print(f"✅ {len(all_data)} schedules récupérées.")
     return all_data
 
@@ -113,19 +546,8 @@ def fetch_schedules(environment_id):
 # ⚙️ TASKS
 # =============================
 def fetch_tasks(environment_id):
-    all_data, offset = [], 0
     print(f"\n🔄 Récupération des tasks ({environment_id})...")
-    while True:
-        url = f"{BASE}/orchestration/executables/tasks?limit=100&offset={offset}&environmentId={environment_id}"
-        data = http_get(url)
-        items = (data or {}).get("items", []) if isinstance(data, dict) else (data or [])
-        if not items:
-            break
-        all_data.extend(items)
-        if len(items) < 100:
-            break
-        offset += 100
-        time.sleep(0.2)
+    all_data = fetch_paginated("/orchestration/executables/tasks", {"environmentId": environment_id})
     print(f"✅ {len(all_data)} tasks récupérées.")
     return all_data
 
@@ -134,19 +556,8 @@ def fetch_tasks(environment_id):
 # 📦 PLANS
 # =============================
 def fetch_plans(environment_id):
-    all_data, offset = [], 0
     print(f"\n🔄 Récupération des plans ({environment_id})...")
-    while True:
-        url = f"{BASE}/orchestration/executables/plans?limit=100&offset={offset}&environmentId={environment_id}"
-        data = http_get(url)
-        items = (data or {}).get("items", []) if isinstance(data, dict) else (data or [])
-        if not items:
-            break
-        all_data.extend(items)
-        if len(items) < 100:
-            break
-        offset += 100
-        time.sleep(0.2)
+    all_data = fetch_paginated("/orchestration/executables/plans", {"environmentId": environment_id})
     print(f"✅ {len(all_data)} plans récupérés.")
     return all_data
 
@@ -155,335 +566,1721 @@ def fetch_plans(environment_id):
 # 📦 ARTEFACTS
 # =============================
 def fetch_artifacts(workspace_id):
-    all_data, offset = [], 0
     print(f"\n🔄 Artefacts du workspace {workspace_id}...")
-    while True:
-        url = f"{BASE}/orchestration/artifacts?limit=100&offset={offset}&workspaceId={workspace_id}"
-        data = http_get(url)
-        items = (data or {}).get("items", []) if isinstance(data, dict) else (data or [])
-        if not items:
-            break
-        all_data.extend(items)
-        if len(items) < 100:
-            break
-        offset += 100
-        time.sleep(0.2)
+    all_data = fetch_paginated("/orchestration/artifacts", {"workspaceId": workspace_id})
     print(f"✅ {len(all_data)} artefacts récupérés.")
     return all_data
 
 
+# =============================
+# 🗂️ DONNÉES PAR ENVIRONNEMENT
+# =============================
+def _workspace_of(item):
+    return (item.get("workspace") or {}).get("id")
+
+
+def _executable_key(item):
+    return item.get("id") or item.get("executable")
+
+
+def partition_by_workspace(schedules, tasks, plans):
+    """Répartit les schedules/tasks/plans d'un environnement par workspace.
+
+    Les éléments sans workspace connu sont rangés sous la clé None et
+    rattachés à chaque workspace de l'environnement.
+    """
+    parts = {}
+
+    def bucket(ws_id):
+        return parts.setdefault(ws_id, {"schedules": [], "tasks": [], "plans": []})
+
+    exec_ws = {}
+    for kind, items in (("tasks", tasks), ("plans", plans)):
+        for item in items:
+            ws_id = _workspace_of(item)
+            exec_ws[_executable_key(item)] = ws_id
+            bucket(ws_id)[kind].append(item)
+    for s in schedules:
+        bucket(exec_ws.get(s.get("executableId")))["schedules"].append(s)
+    return parts
+
+
+_ENV_LOCK = threading.Lock()
+
+
+def load_environment_data(environment_id, env_cache):
+    """Récupère une seule fois par run les exécutables d'un environnement.
+
+    `env_cache` associe à chaque environnement un Future : le premier appelant
+    charge, les appels concurrents attendent le même résultat. Une erreur
+    (reprises déjà épuisées par http_get) est mémorisée pour le run : les
+    workspaces de l'environnement échouent sans relancer le chargement.
+    """
+    with _ENV_LOCK:
+        future = env_cache.get(environment_id)
+        owner = future is None
+        if owner:
+            future = env_cache[environment_id] = Future()
+    if owner:
+        try:
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                schedules, tasks, plans = (
+                    f.result() for f in [pool.submit(fn, environment_id) for fn in (fetch_schedules, fetch_tasks, fetch_plans)]
+                )
+            future.set_result(partition_by_workspace(schedules, tasks, plans))
+        except Exception as exc:
+            future.set_exception(exc)
+    return future.result()
+
+
+def prefetch_environments(environment_ids, env_cache):
+    """Charge en parallèle les données de plusieurs environnements."""
+    todo = [e for e in dict.fromkeys(environment_ids) if e not in env_cache]
+
+    def load(environment_id):
+        try:
+            load_environment_data(environment_id, env_cache)
+        except Exception as exc:  # l'erreur reste dans le Future : chaque workspace concerné sera en échec
+            print(f"❌ Environnement {environment_id} indisponible : {exc}")
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        list(pool.map(load, todo))
+
+
+def workspace_data(workspace, env_cache):
+    """Retourne (schedules, tasks, plans) propres à un workspace."""
+    parts = load_environment_data(workspace["environment_id"], env_cache)
+    own = parts.get(workspace["workspace_id"], {})
+    shared = parts.get(None, {})
+    return tuple(own.get(k, []) + shared.get(k, []) for k in ("schedules", "tasks", "plans"))
+
+
 # =============================
 # 🧩 MAPPING WORKSPACE → PROJET
 # =============================
+_RE_NON_ALNUM = re.compile(r"[^0-9A-Z]+")
+
+
+def _normalize_name(name):
+    """Majuscules sans accents, séparateurs ramenés à un espace : "Prj_Données-DI" → "PRJ DONNEES DI"."""
+    ascii_name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    return _RE_NON_ALNUM.sub(" ", ascii_name.upper()).strip()
+
+
+class ProjectIndex:
+    """Index des noms de projets, normalisés une seule fois.
+
+    Recherche par niveaux, du plus au moins sûr : nom identique (0), mêmes
+    mots (1), tous les mots du workspace présents (2), préfixe de mot (3),
+    sous-chaîne (4, comportement historique). À niveau égal, le projet le
+    plus court puis le premier dans l'ordre alphabétique l'emporte, pour un
+    résultat déterministe.
+    """
+
+    def __init__(self, project_names):
+        self.names = sorted({n for n in project_names if n})
+        self.normalized = {n: _normalize_name(n) for n in self.names}
+        self.by_exact, self.by_compact, self.by_words = {}, {}, {}
+        self.by_token = defaultdict(set)
+        for name, norm in self.normalized.items():
+            self.by_exact.setdefault(norm, name)
+            self.by_compact.setdefault(norm.replace(" ", ""), name)
+            self.by_words.setdefault(frozenset(norm.split()), name)
+            for token in norm.split():
+                self.by_token[token].add(name)
+        self.tokens = sorted(self.by_token)
+
+    def _best(self, tier, candidates):
+        return min(((tier, len(self.normalized[n]), n) for n in candidates), default=None)
+
+    def match(self, workspace_name):
+        key = _normalize_name(workspace_name)
+        if not key:
+            return None
+        compact, words = key.replace(" ", ""), key.split()
+        exact = self.by_exact.get(key) or self.by_compact.get(compact)
+        if exact:
+            return exact
+        if frozenset(words) in self.by_words:
+            return self.by_words[frozenset(words)]
+
+        tiered = [self._best(2, set.intersection(*(self.by_token.get(w, set()) for w in words)))]
+        first = bisect_left(self.tokens, compact)
+        prefixed = set()
+        for token in self.tokens[first:]:
+            if not token.startswith(compact):
+                break
+            prefixed |= self.by_token[token]
+        tiered.append(self._best(3, prefixed))
+        best = min((t for t in tiered if t), default=None)
+        if best is None:
+            best = self._best(4, (n for n, norm in self.normalized.items() if compact in norm.replace(" ", "")))
+        return best[2] if best else None
+
+
 def map_workspaces_to_projects(workspaces, project_map):
+    """Associe chaque workspace à un projet via ProjectIndex.
+
+    Le résultat est mémorisé dans le cache disque, indexé par l'empreinte des
+    noms de projets et de workspaces : il est réutilisé tel quel au run
+    suivant tant que ces référentiels n'ont pas changé.
+    """
+    cache = _cache()
+    fingerprint = hashlib.sha1(json.dumps(
+        [sorted(n for n in project_map.values() if n), sorted((w["workspace_id"] or "", w["workspace_name"] or "") for w in workspaces)]
+    ).encode()).hexdigest()
+    cached = cache.get_value(f"workspace_project_map:{fingerprint}") if cache else None
+    index = None if cached is not None else ProjectIndex(project_map.values())
+
     workspace_project_map = {}
     print("\n🧩 Correspondance Workspaces ↔ Projets Talend")
     print("--------------------------------------------------")
     for w in workspaces:
-        ws_name = (w["workspace_name"] or "").upper()
         env_name = (w["environment_name"] or "")
-        matched_project = None
-        for pname in project_map.values():
-            if pname and ws_name in pname.upper():
-                matched_project = pname
-                break
+        if cached is not None:
+            matched_project = cached.get(w["workspace_id"] or "")
+        else:
+            matched_project = index.match(w["workspace_name"])
         workspace_project_map[w["workspace_id"]] = matched_project or "Inconnu"
         print(f"Workspace: {w['workspace_name']:<12} | Env: {env_name:<6} | Projet: {matched_project or '❌ Aucun'}")
     print("--------------------------------------------------\n")
+    if cache and cached is None:
+        cache.put_value(f"workspace_project_map:{fingerprint}",
+                        {ws_id or "": p for ws_id, p in workspace_project_map.items() if p != "Inconnu"})
     return workspace_project_map
 
 
 # =============================
-# 🕒 LECTURE CRON (v3.5 améliorée)
+# 📈 AFFLUENCE
 # =============================
+HORIZON_DAYS = int(os.environ.get("TMC_HORIZON", str(AFFLUENCE_DAYS)))   # jours couverts par l'Affluence
+HORIZON_START = os.environ.get("TMC_HORIZON_START", "")                  # AAAA-MM-JJ ; vide = lundi courant
 
-def _uniform_step(int_list):
-    """Retourne le pas si la liste a un écart constant, sinon None."""
-    if len(int_list) < 2:
-        return None
-    diffs = [b - a for a, b in zip(int_list, int_list[1:])]
-    return diffs[0] if all(d == diffs[0] for d in diffs) else None
-
-def _dow_label(dow_raw: str) -> str:
-    d = dow_raw.upper().replace(",", ", ")
-    if d in ("1-5", "2-6", "MON-FRI"):
-        return "jours de semaine"
-    if d in ("*", "0-7", "0,1,2,3,4,5,6,7", "0,1,2,3,4,5,6"):
-        return "tous les jours"
-    return d
-
-def readable_cron(expr: str) -> str:
-    if not expr:
-        return ""
-    expr = expr.strip()
 
-    # ----- Normalisation : champ année wildcard (6 champs → 5 champs) -----
-    # ex: "30 4 ? * 2-6 *" → "30 4 ? * 2-6"
-    parts = expr.split()
-    if len(parts) == 6 and parts[-1] in ('*', '?'):
-        expr = ' '.join(parts[:5])
+def horizon():
+    """(premier jour, nombre de jours) de l'horizon d'Affluence : HORIZON_START, sinon lundi de la semaine courante."""
+    return (date.fromisoformat(HORIZON_START) if HORIZON_START else week_start()), HORIZON_DAYS
 
-    # ----- Normalisation : dom=* mois=* dow=? → dom=? mois=* dow=* -----
-    # ex: "00 20 * * ?"  /  "3,8,13 * * * ?" → formes gérées par les regex suivantes
-    parts = expr.split()
-    if len(parts) == 5 and parts[2] == '*' and parts[3] == '*' and parts[4] == '?':
-        parts[2] = '?'
-        parts[4] = '*'
-        expr = ' '.join(parts)
-
-    # ----- Cas spéciaux Talend : fin / jour ouvré de mois -----
-    if re.search(r"\bL\b", expr) and not re.search(r"\bL[-W]", expr):
-        # ex. "5 0 L * ?" → le dernier jour du mois à 00:05
-        m = re.match(r"^(\d{1,2})\s+(\d{1,2})\s+L\s+\*\s+\?", expr)
-        if m:
-            minute, hour = map(int, m.groups())
-            return f"Le dernier jour du mois à {hour:02d}h{minute:02d}"
-        return "Le dernier jour du mois"
-    if re.search(r"\bL-1\b", expr):
-        # ex. "5 0 L-1 * ?" → le dernier jour du mois à 00:05
-        m = re.match(r"^(\d{1,2})\s+(\d{1,2})\s+L-1\s+\*\s+\?", expr)
-        if m:
-            minute, hour = map(int, m.groups())
-            return f"Le dernier jour du mois à {hour:02d}h{minute:02d}"
-        return "Le dernier jour du mois"
-    if re.search(r"\bLW\b", expr):
-        # ex. "5 0 LW * ?" → dernier jour ouvré du mois à 00:05
-        m = re.match(r"^(\d{1,2})\s+(\d{1,2})\s+LW\s+\*\s+\?", expr)
-        if m:
-            minute, hour = map(int, m.groups())
-            return f"Le dernier jour ouvré du mois à {hour:02d}h{minute:02d}"
-        return "Le dernier jour ouvré du mois"
-    if re.search(r"\b1W\b", expr):
-        # ex. "5 0 1W * ?" → 1er jour ouvré du mois à 00:05
-        m = re.match(r"^(\d{1,2})\s+(\d{1,2})\s+1W\s+\*\s+\?", expr)
-        if m:
-            minute, hour = map(int, m.groups())
-            return f"Le 1er jour ouvré du mois à {hour:02d}h{minute:02d}"
-        return "Le 1er jour ouvré du mois"
-
-    # ----- Toutes les X minutes sur une plage horaire (dow optionnel) -----
-    # ex: "*/15 7-18 ? * 2,3,4,5,6"  /  "*/17 8-19 ? * 2-6"
-    m = re.match(r"^\*/(\d+)\s+(\d{1,2})(?:-(\d{1,2}))?\s+\?\s+\*\s+([0-9A-Z,\-*]+)$", expr)
-    if m:
-        freq, h1, h2, dow = m.groups()
-        h1 = int(h1); h2 = int(h2) if h2 else h1
-        lbl = _dow_label(dow)
-        if lbl == "jours de semaine":
-            return f"Toutes les {int(freq)} min de {h1:02d}h à {h2:02d}h (jours de semaine)"
-        if lbl == "tous les jours":
-            return f"Toutes les {int(freq)} min de {h1:02d}h à {h2:02d}h"
-        return f"Toutes les {int(freq)} min de {h1:02d}h à {h2:02d}h ({lbl})"
-
-    # ----- Liste de minutes + plage d'heures -----
-    # ex: "0,30 8-17 ? * 2,3,4,5,6"  → toutes les 30 min 08–17h (jours de semaine)
-    m = re.match(r"^([\d,]+)\s+(\d{1,2})-(\d{1,2})\s+\?\s+\*\s+([0-9A-Z,\-*]+)$", expr)
-    if m:
-        minutes_csv, h1, h2, dow = m.groups()
-        mins = [int(x) for x in minutes_csv.split(",") if x.isdigit()]
-        step = _uniform_step(sorted(mins))
-        lbl = _dow_label(dow)
-        if step and set(mins) == set(range(0, 60, step)):
-            base = f"Toutes les {step} min"
-        elif step:
-            base = f"Chaque {step} min (aux minutes {minutes_csv})"
-        else:
-            base = f"Aux minutes {minutes_csv}"
-        suffix = "" if lbl in ("tous les jours",) else f" ({lbl})"
-        return f"{base} de {int(h1):02d}h à {int(h2):02d}h{suffix}"
-
-    # ----- Liste de minutes + liste/plage d'heures (générique) -----
-    # ex: "0,10,20,30,40,50 5,6,7,8,9,10,... ? * *"
-    m = re.match(r"^([\d,]+)\s+([\d,\-]+)\s+\?\s+\*\s+([0-9A-Z,\-*]+)$", expr)
-    if m:
-        minutes_csv, hours_field, dow = m.groups()
-        mins = [int(x) for x in minutes_csv.split(",") if x.isdigit()]
-        step = _uniform_step(sorted(mins))
-        if "-" in hours_field:
-            h1, h2 = [int(x) for x in hours_field.split("-")]
-            hours_lbl = f"de {h1:02d}h à {h2:02d}h"
-        else:
-            hours = [int(h) for h in hours_field.split(",") if h.isdigit()]
-            hours_lbl = "à " + ", ".join(f"{h:02d}h" for h in hours)
-        lbl = _dow_label(dow)
-        if step and set(mins) == set(range(0, 60, step)):
-            base = f"Toutes les {step} min"
-        elif step:
-            base = f"Chaque {step} min (aux minutes {minutes_csv})"
-        else:
-            base = f"Aux minutes {minutes_csv}"
-        suffix = "" if lbl in ("tous les jours",) else f" ({lbl})"
-        return f"{base} {hours_lbl}{suffix}"
-
-    # ----- Multi-heures (minute fixe) -----
-    # ex: "0 9,14,21 ? * *"  /  "15 8,12,16 ? * 1-5"
-    m = re.match(r"^(\d{1,2})\s+([\d,]+)\s+\?\s+\*\s+([0-9A-Z,\-*]+)$", expr)
-    if m:
-        minute, hours_csv, dow = m.groups()
-        hours = [int(h) for h in hours_csv.split(",") if h.isdigit()]
-        hour_str = ", ".join(f"{h:02d}h" for h in hours)
-        lbl = _dow_label(dow)
-        prefix = "Tous les jours" if lbl == "tous les jours" else ("Tous les jours de semaine" if lbl == "jours de semaine" else f"Chaque semaine ({lbl})")
-        return f"{prefix} à {hour_str}{'' if int(minute)==0 else f' ({int(minute)}m)'}"
-
-    # ----- Horaire unique (dow/hebdo) -----
-    # ex: "20 5 ? * 2-6" / "0 2 ? * *"
-    m = re.match(r"^(\d{1,2})\s+(\d{1,2})\s+\?\s+\*\s+([0-9A-Z,\-*]+)$", expr)
-    if m:
-        minute, hour, dow = m.groups()
-        lbl = _dow_label(dow)
-        if lbl == "jours de semaine":
-            return f"Tous les jours de semaine à {int(hour):02d}h{int(minute):02d}"
-        if lbl == "tous les jours":
-            return f"Tous les jours à {int(hour):02d}h{int(minute):02d}"
-        return f"Chaque semaine ({lbl}) à {int(hour):02d}h{int(minute):02d}"
-
-    # ----- Jours du mois + mois (exécutions mensuelles/annuelles) -----
-    # ex: "00 8 1-31 1-12 ?" / "10 8 1-31 1-12 ?" / "00 10 29 3,6,9,12 ? *"
-    m = re.match(r"^(\d{1,2})\s+(\d{1,2})\s+([\d,\-]+)\s+([\d,\-*]+)\s+\?\s*\*?$", expr)
-    if m:
-        minute, hour, dom, months = m.groups()
-        if months in ("*", "1-12"):
-            return f"Chaque mois, jours {dom}, à {int(hour):02d}h{int(minute):02d}"
-        return f"Jours {dom} des mois {months} à {int(hour):02d}h{int(minute):02d}"
-
-    # ----- Récurrences simples sans plage -----
-    # ex: "*/5 * * * * ?" / "*/10 * * * * ?"
-    if re.search(r"\*/(\d+)", expr) and "?" in expr:
-        freq = int(re.search(r"\*/(\d+)", expr).group(1))
-        return f"Toutes les {freq} minutes"
-
-    # ----- Fallback : on remonte l’expression pour debug -----
-    return f"(CRON: {expr})"
-
-# =============================
-# 🔢 CLASSIFICATION
-# =============================
-def classify_schedule(desc):
-    dl = desc.lower()
-    if "5 min" in dl:
-        return "Every 5min"
-    if "10 min" in dl:
-        return "Every 10min"
-    if re.search(r"toutes les \d+ min", dl):
-        return "Recurring"
-    if "aux minutes" in dl or ("chaque" in dl and "min" in dl):
-        return "Recurring"
-    if "mois" in dl or "mensuel" in dl:
-        return "Monthly"
-    if "tous les jours" in dl or "quotidien" in dl:
-        return "Daily"
-    if "semaine" in dl:
-        return "Weekly"
-    return "Others"
-
-
-def hour_from_cron(expr):
-    try:
-        parts = expr.strip().split()
-        if len(parts) >= 2:
-            h = parts[1]
-            m = re.match(r"(\d+)", h)
-            if m:
-                return int(m.group(1))
-    except Exception:
-        pass
-    return None
+
+def affluence_table(df, start=None, days=None):
+    """Déclenchements réels par heure et par jour de semaine des triggers planifiés, cumulés sur l'horizon."""
+    active = df[df["Statut"] == STATUS_PLANNED]
+    return affluence_from_counts(active["Expression CRON"].value_counts().items(), start, days)
+
+
+def affluence_from_counts(expr_counts, start=None, days=None):
+    """Table d'affluence à partir de couples (expression CRON, nombre de triggers).
+
+    Par défaut sur l'horizon configuré (horizon()) ; un horizon de plusieurs
+    semaines cumule les jours de même nom, ce qui rend compte des triggers
+    mensuels (L, LW, 15W, 1 * ?) quelle que soit la semaine de l'export.
+    """
+    import pandas as pd
+    default_start, default_days = horizon()
+    start, days = start or default_start, days or default_days
+    matrix = [[0] * 7 for _ in range(24)]
+    for expr, n in expr_counts:
+        profile = cron_fire_profile(expr, start, days)
+        if profile is None:
+            continue
+        for wd in range(7):
+            for h in range(24):
+                matrix[h][wd] += n * profile.per_weekday_hour[wd][h]
+    afflu = pd.DataFrame(matrix, columns=WEEKDAYS)
+    afflu.insert(0, "Heure", range(24))
+    afflu["Nombre de déclenchements"] = afflu[WEEKDAYS].sum(axis=1)
+    return afflu
 
 
 # =============================
 # 📊 BUILD DATAFRAME
 # =============================
+STATUS_PAUSED = "⏸️ En pause"
+STATUS_PLANNED = "✅ Planifié"
+STATUS_MANUAL = "❌ Manuel / Inactif"
+
+
+SCHEDULE_COLUMNS = (
+    "Projet", "Workspace", "Type exécutable", "Nom", "Job / Artefact", "Expression CRON", "Description",
+    "Catégorie", "Heure", "Statut", "Environnement", "ID exécutable",
+)
+
+
 def build_dataframe(artifacts, schedules, tasks, plans, workspace_id, workspace_project_map):
-    rows = []
+    """Jointure schedule → task/plan → artefact → workspace, une ligne par trigger.
+
+    Mêmes lignes qu'iter_schedule_rows, construites depuis des tuples
+    (pas de dict par ligne).
+    """
+    import pandas as pd
+    records = list(_schedule_records(artifacts, schedules, tasks, plans, workspace_id, workspace_project_map))
+    if not records:
+        return pd.DataFrame([])
+    return pd.DataFrame.from_records(records, columns=SCHEDULE_COLUMNS)
+
+
+def iter_schedule_rows(artifacts, schedules, tasks, plans, workspace_id, workspace_project_map):
+    """Génère une ligne (dict) par trigger, dans l'ordre des schedules de l'API."""
+    for record in _schedule_records(artifacts, schedules, tasks, plans, workspace_id, workspace_project_map):
+        yield dict(zip(SCHEDULE_COLUMNS, record))
+
+
+def _schedule_records(artifacts, schedules, tasks, plans, workspace_id, workspace_project_map):
+    """Un tuple (colonnes SCHEDULE_COLUMNS) par trigger ; valeurs par schedule et par CRON calculées une fois."""
     artifact_map = {a["id"]: a for a in artifacts}
     task_map = {t.get("id") or t.get("executable"): t for t in tasks}
     plan_map = {p.get("id") or p.get("executable"): p for p in plans}
-    valid_artifacts = {a["id"] for a in artifacts}
+    crons = {}
 
     for s in schedules:
         exec_id = s.get("executableId")
         task = task_map.get(exec_id, {})
         plan = plan_map.get(exec_id, {})
         is_plan = bool(plan)
-        artifact = artifact_map.get(task.get("artifactId") or "", {})
 
-        if not is_plan and task.get("artifactId") not in valid_artifacts:
+        if not is_plan and task.get("artifactId") not in artifact_map:
             continue
+        artifact = artifact_map.get(task.get("artifactId") or "", {})
 
         workspace = (artifact.get("workspace") or {}).get("id", workspace_id)
-        project_name = workspace_project_map.get(workspace, "Inconnu")
+        head = (
+            workspace_project_map.get(workspace, "Inconnu"),
+            workspace,
+            "PLAN" if is_plan else "TASK",
+            plan.get("name", "") if is_plan else task.get("name", ""),
+            artifact.get("name", "") if not is_plan else "",
+        )
         environment = ((artifact.get("workspace") or {}).get("environment") or {}).get("name", "")
+        pause_info = (task.get("taskPauseDetails") or plan.get("planPauseDetails") or {})
+        is_paused = pause_info.get("pause", False)
 
         for trig in s.get("triggers", []):
             cron_expr = trig.get("cronExpression", "")
-            desc = readable_cron(cron_expr)
-            sched_type = classify_schedule(desc)
-            hour = hour_from_cron(cron_expr)
+            translated = crons.get(cron_expr)
+            if translated is None:
+                desc = readable_cron(cron_expr)
+                translated = crons[cron_expr] = (cron_expr, desc, classify_schedule(desc), hour_from_cron(cron_expr))
 
-            pause_info = (task.get("taskPauseDetails") or plan.get("planPauseDetails") or {})
-            is_paused = pause_info.get("pause", False)
             if is_paused:
-                status = "⏸️ En pause"
+                status = STATUS_PAUSED
             elif cron_expr:
-                status = "✅ Planifié"
+                status = STATUS_PLANNED
             else:
-                status = "❌ Manuel / Inactif"
+                status = STATUS_MANUAL
+            yield head + translated + (status, environment, exec_id)
+
+
+# =============================
+# 🚦 PICS & COLLISIONS
+# =============================
+WEEK_MINUTES = 7 * 24 * 60
+PEAK_TOP_N = 10
+MAX_TASKS_LISTED = 50       # noms listés par minute de pic (limite de cellule Excel)
+DURATIONS_FILE = os.environ.get("TMC_DURATIONS", "")
+
+
+@lru_cache(maxsize=4096)
+def week_fire_minutes(expr, start):
+    """Minutes de la semaine (0 = lundi 00:00 de `start`) où l'expression se déclenche.
+
+    Renvoie (indices triés, déclenchements par minute) ; indices vides si
+    l'expression n'est pas interprétable.
+    """
+    import numpy as np
+    sched = parse_cron(expr)
+    if sched is None:
+        return np.empty(0, dtype=np.int64), 0
+    days = np.array(sched.matching_days(start, 7), dtype=np.int64)
+    of_day = np.add.outer(np.array(sched.hours, dtype=np.int64) * 60, sched.minutes).ravel()
+    idx = np.add.outer(days * 1440, of_day).ravel()
+    idx.sort()
+    return idx, sched.seconds
+
+
+def load_durations(path):
+    """Durées moyennes d'exécution (minutes) par nom de tâche depuis un CSV `Nom;Durée`."""
+    import pandas as pd
+    table = pd.read_csv(path, sep=None, engine="python")
+    return {str(name): float(minutes) for name, minutes in zip(table.iloc[:, 0], table.iloc[:, 1])}
+
+
+def _occupancy(starts, weights, durations):
+    """Nombre d'exécutions en cours par minute (semaine circulaire) par différences cumulées."""
+    import numpy as np
+    durations = np.clip(np.ceil(durations).astype(np.int64), 1, WEEK_MINUTES)
+    tail = int(durations.max()) if len(durations) else 0
+    diff = np.zeros(WEEK_MINUTES + tail + 1, dtype=np.int64)
+    np.add.at(diff, starts, weights)
+    np.add.at(diff, starts + durations, -weights)
+    running = np.cumsum(diff)[:WEEK_MINUTES + tail]
+    occupancy = running[:WEEK_MINUTES].copy()
+    occupancy[:tail] += running[WEEK_MINUTES:]
+    return occupancy
+
+
+class TriggerGroup:
+    """Triggers planifiés d'un couple (environnement, expression CRON), en taille bornée.
+
+    Seuls le nombre de triggers, les MAX_TASKS_LISTED premiers noms (ordre
+    alphabétique) et le nombre de triggers par durée connue sont gardés :
+    c'est tout ce que l'onglet Collisions affiche, quel que soit le volume.
+    """
+    __slots__ = ("count", "names", "by_duration")
+
+    def __init__(self):
+        self.count, self.names, self.by_duration = 0, [], Counter()
+
+    def add(self, name, durations=None):
+        self.count += 1
+        if len(self.names) < MAX_TASKS_LISTED or name < self.names[-1]:
+            insort(self.names, name)
+            del self.names[MAX_TASKS_LISTED:]
+        minutes = durations.get(name) if durations else None
+        if minutes:
+            self.by_duration[minutes] += 1
+
+
+def collision_report(df, top_n=PEAK_TOP_N, durations=None, start=None):
+    """Top-N des minutes de la semaine les plus chargées de chaque environnement (rang 1 à N par environnement).
+
+    La chronologie est un tableau de WEEK_MINUTES compteurs par environnement,
+    alimenté par expression CRON distincte (triggers en pause exclus). Si des
+    durées moyennes (minutes, par nom) sont fournies, ajoute la concurrence
+    estimée : exécutions en cours à cette minute (tâches de durée inconnue
+    ignorées).
+    """
+    active = df[df["Statut"] == STATUS_PLANNED]
+    groups = {}
+    for (env, expr), names in active.groupby(["Environnement", "Expression CRON"], dropna=False, sort=False)["Nom"]:
+        group = groups[(env if isinstance(env, str) else "", expr)] = TriggerGroup()
+        for name in names:
+            group.add(name, durations)
+    return collision_report_from_groups(groups, top_n, bool(durations), start)
+
+
+def collision_report_from_groups(groups, top_n=PEAK_TOP_N, durations=False, start=None):
+    """collision_report à partir de {(environnement, expression CRON): TriggerGroup}.
+
+    `durations` indique seulement si la colonne de concurrence est demandée :
+    les durées sont déjà comptées dans chaque groupe.
+    """
+    import numpy as np
+    import pandas as pd
+    start = start or week_start()
+    columns = ["Rang", "Environnement", "Jour", "Minute", "Déclenchements", "Tâches"]
+    if not groups:
+        return pd.DataFrame(columns=columns)
+
+    envs = sorted({env for env, _ in groups})
+    env_index = {e: i for i, e in enumerate(envs)}
+    timeline = np.zeros((len(envs), WEEK_MINUTES), dtype=np.int64)
+    occupancy = np.zeros_like(timeline) if durations else None
+    for (env, expr), group in groups.items():
+        idx, per_minute = week_fire_minutes(expr, start)
+        if not len(idx):
+            continue
+        row = env_index[env]
+        timeline[row, idx] += per_minute * group.count
+        if durations:
+            for minutes, n in group.by_duration.items():
+                occupancy[row] += _occupancy(idx, per_minute * n, np.full(len(idx), minutes))
+
+    # Top-N propre à chaque environnement : un PROD chargé ne masque pas les pics de DEV
+    top = [(row, rank, int(minute))
+           for row in range(len(envs))
+           for rank, minute in enumerate((m for m in np.argsort(-timeline[row], kind="stable")[:top_n]
+                                          if timeline[row, m] > 0), start=1)]
+    report = []
+    for row, rank, minute in top:
+        day, of_day = divmod(minute, 1440)
+        names, count = [], 0
+        for (env, expr), group in groups.items():
+            if env_index[env] != row:
+                continue
+            idx, _ = week_fire_minutes(expr, start)
+            pos = np.searchsorted(idx, minute)
+            if pos < len(idx) and idx[pos] == minute:
+                names.extend(group.names)
+                count += group.count
+        listed = ", ".join(sorted(names)[:MAX_TASKS_LISTED])
+        if count > MAX_TASKS_LISTED:
+            listed += f", … (+{count - MAX_TASKS_LISTED})"
+        entry = {
+            "Rang": rank,
+            "Environnement": envs[row],
+            "Jour": WEEKDAYS[day],
+            "Minute": f"{of_day // 60:02d}h{of_day % 60:02d}",
+            "Déclenchements": int(timeline[row, minute]),
+            "Tâches": listed,
+        }
+        if durations:
+            entry["Concurrence estimée"] = int(occupancy[row, minute])
+        report.append(entry)
+    return pd.DataFrame(report, columns=columns + (["Concurrence estimée"] if durations else []))
+
+
+# =============================
+# ⏳ HISTORIQUE D'EXÉCUTION
+# =============================
+HISTORY_DAYS = int(os.environ.get("TMC_HISTORY_DAYS", "0"))                   # 0 = désactivé
+HISTORY_PERCENTILE = float(os.environ.get("TMC_HISTORY_PERCENTILE", "90"))    # durée retenue pour l'occupation
+HISTORY_PERCENTILES = (50, 90, 95)
+EXECUTION_ENDPOINTS = {
+    "TASK": "/processing/executables/tasks/{}/executions",
+    "PLAN": "/processing/executables/plans/{}/executions",
+}
+_DURATIONS_SEEN = {}  # (ID exécutable, début de fenêtre) → durées, partagé par les workspaces du run
+_DURATIONS_LOCK = threading.Lock()
+
+
+def history_window(days, now=None):
+    """Fenêtre [J-days 00:00 UTC, J 00:00 UTC[ : stable sur la journée, donc servie par le cache disque."""
+    end = (now or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=days)
+    return start.strftime("%Y-%m-%dT%H:%M:%SZ"), end.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _timestamp(value):
+    """Horodatage API (ISO 8601 ou epoch en millisecondes) → datetime, None si absent ou illisible."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, timezone.utc)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
 
-            rows.append({
-                "Projet": project_name,
-                "Workspace": workspace,
-                "Type exécutable": "PLAN" if is_plan else "TASK",
-                "Nom": plan.get("name", "") if is_plan else task.get("name", ""),
-                "Job / Artefact": artifact.get("name", "") if not is_plan else "",
-                "Expression CRON": cron_expr,
-                "Description": desc,
-                "Catégorie": sched_type,
-                "Heure": hour,
-                "Statut": status,
-                "Environnement": environment,
-            })
-    return pd.DataFrame(rows)
+
+def execution_minutes(executions):
+    """Durées (minutes) des exécutions terminées (début et fin connus)."""
+    minutes = []
+    for e in executions:
+        start, finish = _timestamp(e.get("startTimestamp")), _timestamp(e.get("finishTimestamp"))
+        if start and finish and finish >= start:
+            minutes.append((finish - start).total_seconds() / 60)
+    return minutes
+
+
+def fetch_execution_durations(executables, days):
+    """{ID exécutable: [durées en minutes]} sur les `days` derniers jours.
+
+    `executables` : couples (type TASK/PLAN, ID). Une pagination par
+    exécutable, en parallèle (MAX_WORKERS) ; la fenêtre arrondie au jour
+    permet au cache disque de resservir les réponses jusqu'au lendemain.
+    Un exécutable en erreur est ignoré (pas de durée).
+    """
+    window_start, window_end = history_window(days)
+    todo = list(dict.fromkeys(
+        (kind, exec_id) for kind, exec_id in executables
+        if exec_id and kind in EXECUTION_ENDPOINTS and (exec_id, window_start) not in _DURATIONS_SEEN
+    ))
+
+    def load(executable):
+        kind, exec_id = executable
+        try:
+            items = fetch_paginated(EXECUTION_ENDPOINTS[kind].format(exec_id), {"from": window_start, "to": window_end})
+        except TMCApiError as exc:
+            print(f"⚠️ Historique indisponible pour {kind} {exec_id} : {exc}")
+            items = []
+        with _DURATIONS_LOCK:
+            _DURATIONS_SEEN[(exec_id, window_start)] = execution_minutes(items)
+
+    if todo:
+        print(f"\n⏳ Historique d'exécution de {len(todo)} exécutable(s) sur {days} jour(s)...")
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            list(pool.map(load, todo))
+    return {exec_id: _DURATIONS_SEEN.get((exec_id, window_start), []) for _, exec_id in executables}
+
+
+def duration_table(df, durations):
+    """Percentiles de durée (minutes) par exécutable planifié ayant au moins une exécution."""
+    import numpy as np
+    import pandas as pd
+    columns = ["Environnement", "Type exécutable", "Nom", "ID exécutable", "Exécutions",
+               *(f"P{p} (min)" for p in HISTORY_PERCENTILES), "Max (min)"]
+    rows = []
+    executables = df[["Environnement", "Type exécutable", "Nom", "ID exécutable"]].drop_duplicates("ID exécutable")
+    for env, kind, name, exec_id in executables.itertuples(index=False, name=None):
+        minutes = durations.get(exec_id)
+        if not minutes:
+            continue
+        values = np.percentile(minutes, HISTORY_PERCENTILES)
+        rows.append([env, kind, name, exec_id, len(minutes), *np.round(values, 1), round(max(minutes), 1)])
+    return pd.DataFrame(rows, columns=columns)
+
+
+def occupancy_table(df, durations, percentile, start=None):
+    """Occupation des moteurs : exécutions simultanées par heure et par environnement.
+
+    Chaque trigger planifié occupe un moteur pendant le P`percentile` de
+    ses durées observées, à partir de chacun de ses déclenchements sur la
+    semaine de référence. Pour chaque heure de la journée : pic et moyenne
+    sur les 7 jours × 60 minutes. Triggers sans historique ignorés.
+    """
+    import numpy as np
+    import pandas as pd
+    start = start or week_start()
+    planned = df[df["Statut"] == STATUS_PLANNED]
+    groups = Counter()
+    for env, expr, exec_id in planned[["Environnement", "Expression CRON", "ID exécutable"]].itertuples(index=False, name=None):
+        minutes = durations.get(exec_id)
+        if minutes:
+            groups[(env or "", expr, int(np.ceil(np.percentile(minutes, percentile))))] += 1
+
+    envs = sorted(set(planned["Environnement"].fillna("")) | {env for env, _, _ in groups})
+    curves = {env: np.zeros(WEEK_MINUTES, dtype=np.int64) for env in envs}
+    for (env, expr, minutes), n in groups.items():
+        idx, per_minute = week_fire_minutes(expr, start)
+        if len(idx):
+            curves[env] += _occupancy(idx, per_minute * n, np.full(len(idx), minutes))
+    curves["Total"] = sum(curves.values(), np.zeros(WEEK_MINUTES, dtype=np.int64))
+
+    table = pd.DataFrame({"Heure": range(24)})
+    for env, curve in curves.items():
+        by_hour = curve.reshape(7, 24, 60).transpose(1, 0, 2).reshape(24, -1)
+        label = env or "(sans environnement)"
+        table[f"{label} – pic"] = by_hour.max(axis=1)
+        table[f"{label} – moyenne"] = by_hour.mean(axis=1).round(1)
+    return table
+
+
+def history_tables(df, days=None, percentile=None):
+    """Onglets Durées et Occupation à partir de l'historique des exécutables planifiés.
+
+    Par défaut : HISTORY_DAYS jours, durée au percentile HISTORY_PERCENTILE.
+    """
+    days = days or HISTORY_DAYS
+    percentile = percentile or HISTORY_PERCENTILE
+    planned = df[df["Statut"] == STATUS_PLANNED]
+    executables = list(zip(planned["Type exécutable"], planned["ID exécutable"]))
+    durations = fetch_execution_durations(executables, days)
+    return {
+        "Durées": duration_table(planned, durations),
+        "Occupation": occupancy_table(df, durations, percentile),
+    }
+
+
+# =============================
+# 🧘 LISSAGE DES PICS
+# =============================
+SMOOTHING = os.environ.get("TMC_SMOOTH", "") == "1"
+# « Recurring » : classify_schedule range ainsi les horaires fixes (« Aux minutes 0 à 02h ») ;
+# les vraies récurrences (*/15, plages d'heures) sont écartées par shift_cron.
+SMOOTH_CATEGORIES = [c.strip() for c in os.environ.get("TMC_SMOOTH_CATEGORIES", "Daily,Weekly,Recurring").split(",")
+                     if c.strip()]
+SMOOTH_WINDOW = int(os.environ.get("TMC_SMOOTH_WINDOW", "60"))   # décalage maximal (± minutes)
+SMOOTH_STEP = int(os.environ.get("TMC_SMOOTH_STEP", "5"))        # granularité des décalages (minutes)
+SMOOTH_HOURS = os.environ.get("TMC_SMOOTH_HOURS", "")            # heures autorisées, ex. « 20-6 » ou « 0-5,22,23 »
+SMOOTH_FREEZE = []                                               # motifs (nom, ID, regex) jamais déplacés
+SMOOTH_PASSES = 10                                               # passes max de recherche locale
+
+
+def _hour_set(spec):
+    """« 20-6 » / « 0-5,22 » → frozenset d'heures (plages circulaires) ; None si vide (toutes les heures)."""
+    if not spec:
+        return None
+    hours = set()
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        first, last = int(first), int(last or first)
+        if not (0 <= first <= 23 and 0 <= last <= 23):
+            raise ValueError(f"heure invalide : {part}")
+        hours.update(range(first, last + 1) if first <= last else [*range(first, 24), *range(last + 1)])
+    return frozenset(hours)
+
+
+def shift_cron(expr, offset):
+    """Expression décalée de `offset` minutes dans la journée.
+
+    Ne s'applique qu'aux formes « minute fixe, heure(s) fixe(s) » ; None si
+    l'expression ne s'y prête pas ou si un déclenchement changerait de jour
+    (les champs jour, mois et année sont conservés tels quels).
+    """
+    parts = expr.split()
+    if len(parts) not in (5, 6, 7):
+        return None
+    i = 1 if len(parts) == 7 else 0
+    hours = parts[i + 1].split(",")
+    if not parts[i].isdigit() or not all(h.isdigit() for h in hours):
+        return None
+    totals = [int(h) * 60 + int(parts[i]) + offset for h in hours]
+    if min(totals) < 0 or max(totals) >= 1440 or max(int(h) for h in hours) > 23:
+        return None
+    if offset == 0:
+        return expr
+    parts[i] = str(totals[0] % 60)
+    parts[i + 1] = ",".join(str(t // 60) for t in totals)
+    return " ".join(parts)
+
+
+def _cron_hours(expr):
+    """Heures fixes d'une expression « minute heure(s) … » (liste vide sinon)."""
+    parts = expr.split()
+    field = parts[2 if len(parts) == 7 else 1] if len(parts) >= 5 else ""
+    return [int(h) for h in field.split(",") if h.isdigit()]
+
+
+@lru_cache(maxsize=4096)
+def _shift_offsets(expr, window, step, hours):
+    """Décalages possibles (0 compris) d'une expression : fenêtre ±window, pas `step`, heures autorisées."""
+    offsets = []
+    for offset in range(-(window // step) * step, window + 1, step):
+        shifted = shift_cron(expr, offset)
+        if shifted is None:
+            continue
+        if offset and hours is not None and not set(_cron_hours(shifted)) <= hours:
+            continue
+        offsets.append(offset)
+    return tuple(offsets)
+
+
+def _footprint(expr, minutes, start):
+    """Minutes de la semaine occupées par un trigger (déclenchements, étendus à sa durée) et poids."""
+    import numpy as np
+    idx, per_minute = week_fire_minutes(expr, start)
+    if minutes and len(idx):
+        span = np.arange(int(np.clip(np.ceil(minutes), 1, 1440)), dtype=np.int64)
+        idx = (idx[:, None] + span).ravel() % WEEK_MINUTES
+    return idx, per_minute
+
+
+def smoothing_plan(df, durations=None, start=None):
+    """Décalages proposés pour aplanir les pics, par environnement.
+
+    Histogramme par minute de la semaine de référence : déclenchements, ou
+    exécutions en cours si des durées (minutes, par nom) sont connues. Seuls
+    les triggers planifiés des catégories SMOOTH_CATEGORIES, non gelés et de
+    forme « minute fixe, heure(s) fixe(s) » sont déplaçables, de ±SMOOTH_WINDOW
+    minutes par pas de SMOOTH_STEP, dans les heures SMOOTH_HOURS. Placement
+    glouton (plus grosses empreintes d'abord) puis recherche locale : chaque
+    trigger est retiré et replacé au meilleur décalage tant que l'objectif
+    (pic, puis somme des carrés, puis plus petit décalage) s'améliore.
+
+    `df` est indexé par position (0..n-1). Renvoie ({position: décalage
+    retenu} des triggers déplaçables, courbes avant, courbes après), où
+    courbes = {environnement: occupation par minute de la semaine}.
+    """
+    import numpy as np
+    start = start or week_start()
+    hours = _hour_set(SMOOTH_HOURS)
+    envs = df["Environnement"].fillna("").to_numpy(dtype=object)
+    exprs = df["Expression CRON"].to_numpy(dtype=object)
+    names = df["Nom"].to_numpy(dtype=object)
+    ids = df["ID exécutable"].to_numpy(dtype=object)
+    categories = df["Catégorie"].to_numpy(dtype=object)
+
+    before, load = {}, {}
+    movable = []   # (position, environnement, empreinte, poids, décalages)
+    for pos in np.flatnonzero((df["Statut"] == STATUS_PLANNED).to_numpy()).tolist():
+        env = envs[pos]
+        foot, weight = _footprint(exprs[pos], (durations or {}).get(names[pos]), start)
+        if not len(foot):
+            continue
+        curve = before.setdefault(env, np.zeros(WEEK_MINUTES, dtype=np.int64))
+        np.add.at(curve, foot, weight)
+        offsets = ()
+        if categories[pos] in SMOOTH_CATEGORIES and not _matches(SMOOTH_FREEZE, names[pos], ids[pos]):
+            offsets = _shift_offsets(exprs[pos], SMOOTH_WINDOW, SMOOTH_STEP, hours)
+        if len(offsets) > 1:
+            movable.append((pos, env, foot, weight, np.array(offsets, dtype=np.int64)))
+        else:
+            np.add.at(load.setdefault(env, np.zeros(WEEK_MINUTES, dtype=np.int64)), foot, weight)
+
+    def best(curve, foot, weight, offsets):
+        cells = (foot[None, :] + offsets[:, None]) % WEEK_MINUTES
+        current = curve[cells]
+        peak = current.max(axis=1) + weight
+        squares = (2 * current * weight + weight * weight).sum(axis=1)
+        return offsets[np.lexsort((np.abs(offsets), squares, peak))[0]]
+
+    # Glouton : les empreintes les plus lourdes sont placées en premier
+    movable.sort(key=lambda m: -len(m[2]) * m[3])
+    chosen = {}
+    for pos, env, foot, weight, offsets in movable:
+        curve = load.setdefault(env, np.zeros(WEEK_MINUTES, dtype=np.int64))
+        chosen[pos] = int(best(curve, foot, weight, offsets))
+        np.add.at(curve, (foot + chosen[pos]) % WEEK_MINUTES, weight)
+
+    # Recherche locale : meilleure réponse trigger par trigger, jusqu'à stabilité
+    for _ in range(SMOOTH_PASSES):
+        moved = 0
+        for pos, env, foot, weight, offsets in movable:
+            curve = load[env]
+            np.add.at(curve, (foot + chosen[pos]) % WEEK_MINUTES, -weight)
+            offset = int(best(curve, foot, weight, offsets))
+            np.add.at(curve, (foot + offset) % WEEK_MINUTES, weight)
+            if offset != chosen[pos]:
+                chosen[pos], moved = offset, moved + 1
+        if not moved:
+            break
+    return chosen, before, load
+
+
+def smoothing_tables(df, durations=None, start=None):
+    """Onglets Lissage (CRON proposé par trigger déplacé) et Affluence lissée (avant / après par heure)."""
+    import numpy as np
+    import pandas as pd
+    start = start or week_start()
+    frame = df.reset_index(drop=True)
+    chosen, before, after = smoothing_plan(frame, durations, start)
+
+    columns = ["Environnement", "Type exécutable", "Nom", "ID exécutable", "Catégorie"]
+    moves = {pos: offset for pos, offset in chosen.items() if offset}
+    plan = frame.loc[sorted(moves), columns].copy()
+    plan["CRON actuel"] = frame.loc[sorted(moves), "Expression CRON"]
+    plan["CRON proposé"] = [shift_cron(frame.at[pos, "Expression CRON"], moves[pos]) for pos in sorted(moves)]
+    plan["Décalage (min)"] = [moves[pos] for pos in sorted(moves)]
+    plan = plan.sort_values(["Environnement", "Nom"]).reset_index(drop=True)
+
+    smoothed = frame.copy()
+    for pos, offset in moves.items():
+        smoothed.at[pos, "Expression CRON"] = shift_cron(frame.at[pos, "Expression CRON"], offset)
+    per_hour = {"avant": affluence_table(frame), "après": affluence_table(smoothed)}
+
+    def hourly_peak(curves):
+        if not curves:
+            return np.zeros(24, dtype=np.int64)
+        stacked = np.stack(list(curves.values()))                       # environnement × minute
+        return stacked.reshape(len(curves), 7, 24, 60).max(axis=(0, 1, 3))
+
+    comparison = pd.DataFrame({
+        "Heure": range(24),
+        "Déclenchements avant": per_hour["avant"]["Nombre de déclenchements"],
+        "Déclenchements après": per_hour["après"]["Nombre de déclenchements"],
+        "Pic / minute avant": hourly_peak(before),
+        "Pic / minute après": hourly_peak(after),
+    })
+    peak_before, peak_after = comparison["Pic / minute avant"].max(), comparison["Pic / minute après"].max()
+    print(f"🧘 Lissage : {len(plan)} trigger(s) décalé(s), pic par minute {peak_before} → {peak_after}")
+    return {"Lissage": plan, "Affluence lissée": comparison}
 
 
 # =============================
 # 📈 EXPORT
 # =============================
-def export_excel(df, project, env):
+STREAMING = os.environ.get("TMC_STREAMING", "") == "1"      # export Excel en flux (mémoire indépendante du nombre de lignes)
+FORMATS = [f.strip().lower() for f in os.environ.get("TMC_FORMAT", "xlsx").split(",") if f.strip()]
+CONSOLIDATED = os.environ.get("TMC_CONSOLIDATED", "") == "1"  # un seul fichier pour tous les workspaces
+CONSOLIDATED_STEM = "tmc_schedules_consolidated"
+CATEGORICAL_COLUMNS = ["Projet", "Catégorie", "Statut"]
+OUTPUT_DIR = os.environ.get("TMC_OUTPUT_DIR", ".")
+
+
+def _output_stem(project, env):
     safe_project = re.sub(r'[^\w\-]', '_', project)
     safe_env = re.sub(r'[^\w\-]', '_', env)
-    output = f"tmc_schedules_{safe_project}_{safe_env}.xlsx"
+    return os.path.join(OUTPUT_DIR, f"tmc_schedules_{safe_project}_{safe_env}")
+
+
+def _output_name(project, env, ext="xlsx"):
+    return f"{_output_stem(project, env)}.{ext}"
+
+
+def _count_table(df, column):
+    table = df[column].value_counts().reset_index()
+    table.columns = [column, "Nombre"]
+    table.loc[len(table)] = ["Total", table["Nombre"].sum()]
+    return table
+
+
+def environment_tables(df, start=None, days=None):
+    """Onglets inter-environnements de l'export consolidé.
+
+    Environnements : volumes, déclenchements et heure de pointe par environnement.
+    Affluence env : déclenchements par heure, une colonne par environnement.
+    Écarts : exécutables (même projet, type et nom) présents dans plusieurs
+    environnements mais planifiés différemment (CRON ou statut).
+    """
+    import pandas as pd
+    keys = ["Projet", "Type exécutable", "Nom"]
+    envs = sorted(df["Environnement"].fillna("").unique())
+    planned = df[df["Statut"] == STATUS_PLANNED]
+
+    overview, hourly = [], pd.DataFrame({"Heure": range(24)})
+    for env in envs:
+        rows = df[df["Environnement"].fillna("") == env]
+        afflu = affluence_from_counts(
+            planned.loc[planned["Environnement"].fillna("") == env, "Expression CRON"].value_counts().items(),
+            start, days,
+        )
+        per_hour = afflu["Nombre de déclenchements"]
+        hourly[env or "(sans environnement)"] = per_hour
+        overview.append({
+            "Environnement": env,
+            "Schedules": len(rows),
+            "Exécutables": rows[keys].drop_duplicates().shape[0],
+            STATUS_PLANNED: int((rows["Statut"] == STATUS_PLANNED).sum()),
+            STATUS_PAUSED: int((rows["Statut"] == STATUS_PAUSED).sum()),
+            STATUS_MANUAL: int((rows["Statut"] == STATUS_MANUAL).sum()),
+            "Déclenchements": int(per_hour.sum()),
+            "Heure de pointe": int(per_hour.idxmax()) if per_hour.any() else None,
+        })
+    hourly["Total"] = hourly.drop(columns="Heure").sum(axis=1)
+
+    signature = df["Expression CRON"].fillna("").where(df["Statut"] == STATUS_PLANNED,
+                                                      df["Expression CRON"].fillna("") + " [" + df["Statut"] + "]")
+    per_env = (df[keys + ["Environnement"]].fillna("").assign(Planification=signature.str.strip())
+               .groupby(keys + ["Environnement"])["Planification"]
+               .agg(lambda s: " | ".join(sorted(set(s)))))
+    wide = per_env.unstack("Environnement")
+    present = wide.notna().sum(axis=1)
+    differs = wide.nunique(axis=1) > 1
+    gaps = wide[(present > 1) & differs].fillna("").reset_index()
+    gaps.columns.name = None
+    return {
+        "Environnements": pd.DataFrame(overview),
+        "Affluence env": hourly,
+        "Écarts": gaps,
+    }
+
+
+def summary_tables(df, consolidated=False):
+    """Onglets de synthèse communs à tous les formats : Recap, Statuts, Affluence, Collisions.
+
+    L'export consolidé y ajoute les onglets inter-environnements (environment_tables),
+    l'option d'historique les onglets Durées et Occupation (history_tables), le
+    lissage les onglets Lissage et Affluence lissée (smoothing_tables).
+    """
+    durations = load_durations(DURATIONS_FILE) if DURATIONS_FILE else None
+    tables = {
+        "Recap": _count_table(df, "Catégorie"),
+        "Statuts": _count_table(df, "Statut"),
+        "Affluence": affluence_table(df),
+        "Collisions": collision_report(df, durations=durations),
+    }
+    if consolidated:
+        tables.update(environment_tables(df))
+    if HISTORY_DAYS > 0:
+        with METRICS.phase("historique"):
+            tables.update(history_tables(df))
+    if SMOOTHING:
+        with METRICS.phase("lissage"):
+            tables.update(smoothing_tables(df, durations))
+    return tables
+
+
+def export_excel(df, project, env, stem=None, tables=None):
+    import pandas as pd
+    output = f"{stem or _output_stem(project, env)}.xlsx"
     print(f"\n💾 Génération du fichier Excel : {output}")
 
     with pd.ExcelWriter(output, engine="openpyxl") as writer:
         df_sorted = df.sort_values(by=["Type exécutable", "Statut", "Catégorie", "Heure", "Nom"])
         df_sorted.to_excel(writer, sheet_name="Schedules", index=False)
+        for sheet, table in (tables or summary_tables(df)).items():
+            table.to_excel(writer, sheet_name=sheet, index=False)
 
-        recap = df["Catégorie"].value_counts().reset_index()
-        recap.columns = ["Catégorie", "Nombre"]
-        recap.loc[len(recap)] = ["Total", recap["Nombre"].sum()]
-        recap.to_excel(writer, sheet_name="Recap", index=False)
+    print(f"✅ Export terminé : {output}\n")
 
-        stat = df["Statut"].value_counts().reset_index()
-        stat.columns = ["Statut", "Nombre"]
-        stat.loc[len(stat)] = ["Total", stat["Nombre"].sum()]
-        stat.to_excel(writer, sheet_name="Statuts", index=False)
 
-        afflu = Counter(df.dropna(subset=["Heure"])["Heure"])
-        afflu_df = pd.DataFrame(sorted(afflu.items()), columns=["Heure", "Nombre de déclenchements"])
-        afflu_df.to_excel(writer, sheet_name="Affluence", index=False)
+def _typed_schedules(df):
+    import pandas as pd
+    typed = df.copy()
+    for column in CATEGORICAL_COLUMNS:
+        typed[column] = typed[column].astype("category")
+    typed["Heure"] = pd.to_numeric(typed["Heure"], errors="coerce").astype("Int8")
+    return typed
 
-    print(f"✅ Export terminé : {output}\n")
+
+def export_tables(df, project, env, fmt, stem=None, tables=None):
+    """Écrit Schedules et les synthèses en Parquet, CSV ou JSONL (un fichier par table).
+
+    Schedules → `<stem>.<fmt>`, synthèses → `<stem>_<onglet>.<fmt>`. Le Parquet
+    conserve les types (Heure entière, Projet/Catégorie/Statut catégoriels).
+    """
+    stem = stem or _output_stem(project, env)
+    files = {"": _typed_schedules(df)}
+    files.update({f"_{_file_suffix(name)}": table for name, table in (tables or summary_tables(df)).items()})
+    print(f"\n💾 Génération des fichiers {fmt.upper()} : {stem}*.{fmt}")
+    for suffix, table in files.items():
+        _write_table(table, f"{stem}{suffix}.{fmt}", fmt)
+    print(f"✅ Export terminé : {len(files)} fichiers {fmt.upper()}\n")
+
+
+def _write_table(table, output, fmt):
+    if fmt == "parquet":
+        try:
+            table.to_parquet(output, index=False)
+        except ImportError as exc:
+            raise RuntimeError(f"Export Parquet impossible : {exc} (pip install pyarrow)") from exc
+    elif fmt == "csv":
+        table.to_csv(output, index=False)
+    elif fmt == "jsonl":
+        table.to_json(output, orient="records", lines=True, force_ascii=False)
+    else:
+        raise ValueError(f"Format inconnu : {fmt}")
+
+
+def _file_suffix(sheet):
+    """Nom d'onglet → suffixe de fichier ASCII (« Affluence env » → affluence_env, « Écarts » → ecarts)."""
+    ascii_name = unicodedata.normalize("NFKD", sheet).encode("ascii", "ignore").decode()
+    return re.sub(r"\W+", "_", ascii_name).strip("_").lower()
+
+
+def export_outputs(df, project, env, stem=None, consolidated=False):
+    """Exporte le DataFrame dans chacun des formats demandés (FORMATS).
+
+    Les synthèses sont calculées une seule fois puis écrites dans chaque format.
+    """
+    with METRICS.phase("synthèses"):
+        tables = summary_tables(df, consolidated)
+    for fmt in FORMATS:
+        with METRICS.phase(f"export {fmt}"):
+            if fmt == "xlsx":
+                export_excel(df, project, env, stem, tables)
+            else:
+                export_tables(df, project, env, fmt, stem, tables)
+
+
+def _count_rows(counter):
+    rows = [list(item) for item in counter.most_common()]
+    rows.append(["Total", sum(counter.values())])
+    return rows
+
+
+def export_excel_streaming(rows, project, env):
+    """Variante d'export_excel en flux (classeur openpyxl write-only).
+
+    Les lignes sont écrites au fil du générateur, dans l'ordre de l'API (pas
+    de tri) ; Recap, Statuts, Affluence et Collisions sont calculés par
+    compteurs incrémentaux. La mémoire dépend du nombre de couples
+    (environnement, CRON) distincts, pas du nombre de lignes : chaque couple
+    ne garde qu'un TriggerGroup. Renvoie le nombre de lignes écrites.
+    """
+    from openpyxl import Workbook
+    output = _output_name(project, env)
+    print(f"\n💾 Génération du fichier Excel (flux) : {output}")
+
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet("Schedules")
+    categories, statuses, groups = Counter(), Counter(), {}
+    durations = load_durations(DURATIONS_FILE) if DURATIONS_FILE else None
+    written = 0
+    for row in rows:
+        if not written:
+            sheet.append(list(row))
+        sheet.append(list(row.values()))
+        written += 1
+        categories[row["Catégorie"]] += 1
+        statuses[row["Statut"]] += 1
+        if row["Statut"] == STATUS_PLANNED:
+            key = (row["Environnement"] or "", row["Expression CRON"])
+            group = groups.get(key) or groups.setdefault(key, TriggerGroup())
+            group.add(row["Nom"], durations)
+
+    for title, header, counter in (("Recap", "Catégorie", categories), ("Statuts", "Statut", statuses)):
+        ws = wb.create_sheet(title)
+        ws.append([header, "Nombre"])
+        for r in _count_rows(counter):
+            ws.append(r)
+
+    expr_counts = Counter()
+    for (_, expr), group in groups.items():
+        expr_counts[expr] += group.count
+    for title, table in (
+        ("Affluence", affluence_from_counts(expr_counts.items())),
+        ("Collisions", collision_report_from_groups(groups, durations=bool(durations))),
+    ):
+        ws = wb.create_sheet(title)
+        ws.append(list(table.columns))
+        for r in table.itertuples(index=False):
+            ws.append(list(r))
+
+    wb.save(output)
+    print(f"✅ Export terminé : {output} ({written} lignes)\n")
+    return written
 
 
 # =============================
-# 🚀 MAIN
+# 🔁 SNAPSHOTS & DIFF
 # =============================
-if __name__ == "__main__":
-    print("🚀 Export Talend Cloud Schedules – NextDecision Edition v3.5\n")
+SNAPSHOTS = os.environ.get("TMC_SNAPSHOT", "1") != "0"  # empreinte compacte de chaque export
+DIFF = os.environ.get("TMC_DIFF", "") == "1"              # n'exporter que les changements
+SNAPSHOT_VERSION = 2          # v2 : clés par contenu du trigger (v1 : par rang)
+SNAPSHOT_FIELDS = ("Projet", "Workspace", "Type exécutable", "Nom", "Environnement", "Expression CRON", "Statut")
+_SNAP_CRON = 1 + SNAPSHOT_FIELDS.index("Expression CRON")
+_SNAP_STATUS = 1 + SNAPSHOT_FIELDS.index("Statut")
+CHANGE_ADDED = "➕ Ajouté"
+CHANGE_REMOVED = "➖ Supprimé"
+CHANGE_PAUSED = "⏸️ Mis en pause"
+CHANGE_RESUMED = "▶️ Repris"
+CHANGE_RETIMED = "🕒 Re-planifié"
+CHANGE_OTHER = "✏️ Modifié"
+
+
+def _snapshot_value(value):
+    """Valeur normalisée pour le hash : identique qu'elle vienne d'un dict ou d'un DataFrame."""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        return value
+    if isinstance(value, numbers.Integral) or float(value).is_integer():
+        return int(value)
+    return value
+
+
+class Snapshot:
+    """Empreinte compacte d'un export : une entrée par trigger.
+
+    Clé `<ID exécutable>#<expression CRON>#<n>` (n = occurrence de cette
+    expression parmi les triggers de l'exécutable, en général 0) → [hash de
+    la ligne complète] + SNAPSHOT_FIELDS. Ajouter ou retirer un trigger ne
+    décale donc pas les clés des autres. Ces champs suffisent à décrire un
+    changement et à recalculer la charge horaire sans relire l'export
+    précédent.
+    """
+
+    def __init__(self, entries=None, created=None):
+        self.entries = {} if entries is None else entries
+        self.created = created or datetime.now().isoformat(timespec="seconds")
+        self._seen = Counter()
+
+    def add(self, row):
+        trigger = (row["ID exécutable"], row["Expression CRON"] or "")
+        key = f"{trigger[0]}#{trigger[1]}#{self._seen[trigger]}"
+        self._seen[trigger] += 1
+        payload = json.dumps([_snapshot_value(v) for v in row.values()], ensure_ascii=False, default=str)
+        digest = hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+        self.entries[key] = [digest] + [_snapshot_value(row[f]) for f in SNAPSHOT_FIELDS]
+        return row
+
+    def recording(self, rows):
+        """Laisse passer les lignes d'un générateur en les ajoutant au snapshot."""
+        for row in rows:
+            yield self.add(row)
+
+    @classmethod
+    def from_frame(cls, df):
+        snapshot = cls()
+        columns = list(df.columns)
+        for values in df.itertuples(index=False, name=None):
+            snapshot.add(dict(zip(columns, values)))
+        return snapshot
+
+    def hourly_load(self, start=None):
+        """Déclenchements par heure (horizon d'Affluence) des triggers planifiés."""
+        counts = Counter(e[_SNAP_CRON] for e in self.entries.values() if e[_SNAP_STATUS] == STATUS_PLANNED)
+        return affluence_from_counts(counts.items(), start)["Nombre de déclenchements"]
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "created": self.created, "entries": self.entries},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Snapshot enregistré, ou None s'il est absent, illisible ou d'une autre version."""
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != SNAPSHOT_VERSION:
+            return None
+        return cls(data["entries"], data.get("created"))
+
+
+def _snapshot_path(stem):
+    return f"{stem}.snapshot.json.gz"
+
+
+def _snapshot_exec(key):
+    """ID exécutable d'une clé de snapshot (les ID ne contiennent pas de « # », les CRON si : MON#1)."""
+    return key.split("#", 1)[0]
+
+
+def _paired_keys(old, new):
+    """Couples (clé avant, clé après) : même clé d'abord, puis, par exécutable, triggers restants dans l'ordre.
+
+    Un trigger dont seule l'expression change est ainsi vu comme re-planifié
+    plutôt que supprimé puis ajouté ; None d'un côté = ajout ou suppression.
+    """
+    unmatched = defaultdict(list)
+    for key in new.entries:
+        if key not in old.entries:
+            unmatched[_snapshot_exec(key)].append(key)
+    pairs = []
+    for key in old.entries:
+        if key in new.entries:
+            pairs.append((key, key))
+        else:
+            candidates = unmatched.get(_snapshot_exec(key))
+            pairs.append((key, candidates.pop(0) if candidates else None))
+    pairs.extend((None, key) for keys in unmatched.values() for key in keys)
+    return pairs
+
+
+def _change_kind(before, after):
+    if before is None:
+        return CHANGE_ADDED
+    if after is None:
+        return CHANGE_REMOVED
+    was_paused, is_paused = before[_SNAP_STATUS] == STATUS_PAUSED, after[_SNAP_STATUS] == STATUS_PAUSED
+    if is_paused and not was_paused:
+        return CHANGE_PAUSED
+    if was_paused and not is_paused:
+        return CHANGE_RESUMED
+    if before[_SNAP_CRON] != after[_SNAP_CRON]:
+        return CHANGE_RETIMED
+    return CHANGE_OTHER
+
+
+def _schedule_label(entry):
+    if entry is None:
+        return ""
+    cron, status = entry[_SNAP_CRON] or "", entry[_SNAP_STATUS]
+    return cron if status == STATUS_PLANNED else f"{cron} [{status}]".strip()
+
+
+def diff_snapshots(old, new, start=None):
+    """Changements entre deux snapshots (temps linéaire) : onglets Changements et Charge horaire."""
+    import pandas as pd
+    changes = []
+    for old_key, new_key in _paired_keys(old, new):
+        before, after = old.entries.get(old_key), new.entries.get(new_key)
+        if before is not None and after is not None and before[0] == after[0]:
+            continue
+        ref = after or before
+        changes.append({
+            "Changement": _change_kind(before, after),
+            **dict(zip(SNAPSHOT_FIELDS[:5], ref[1:6])),
+            "ID exécutable": _snapshot_exec(old_key or new_key),
+            "Avant": _schedule_label(before),
+            "Après": _schedule_label(after),
+        })
+    columns = ["Changement", *SNAPSHOT_FIELDS[:5], "ID exécutable", "Avant", "Après"]
+    load = pd.DataFrame({"Heure": range(24), "Avant": old.hourly_load(start), "Après": new.hourly_load(start)})
+    load["Écart"] = load["Après"] - load["Avant"]
+    return {"Changements": pd.DataFrame(changes, columns=columns), "Charge horaire": load}
+
+
+def export_diff(tables, stem):
+    """Écrit le diff dans chacun des formats demandés : `<stem>_diff.xlsx` ou `<stem>_diff_<table>.<fmt>`."""
+    import pandas as pd
+    for fmt in FORMATS:
+        if fmt == "xlsx":
+            output = f"{stem}_diff.xlsx"
+            with pd.ExcelWriter(output, engine="openpyxl") as writer:
+                for sheet, table in tables.items():
+                    table.to_excel(writer, sheet_name=sheet, index=False)
+            print(f"✅ Diff exporté : {output}")
+        else:
+            for name, table in tables.items():
+                _write_table(table, f"{stem}_diff_{_file_suffix(name)}.{fmt}", fmt)
+            print(f"✅ Diff exporté : {stem}_diff_*.{fmt}")
+
 
-    projects = fetch_projects()
-    workspaces = fetch_workspaces()
-    workspace_project_map = map_workspaces_to_projects(workspaces, projects)
+def record_snapshot(snapshot, stem):
+    """Compare au snapshot précédent en mode diff, puis enregistre le nouveau.
+
+    Renvoie le nombre de changements détectés (None sans snapshot de référence
+    ou hors mode diff).
+    """
+    with METRICS.phase("snapshot / diff"):
+        return _record_snapshot(snapshot, stem)
+
+
+def _record_snapshot(snapshot, stem):
+    path = _snapshot_path(stem)
+    n_changes = None
+    if DIFF:
+        previous = Snapshot.load(path)
+        if previous is None:
+            print(f"ℹ️ Aucun snapshot précédent pour {os.path.basename(stem)} : référence créée.")
+        else:
+            tables = diff_snapshots(previous, snapshot)
+            changes = tables["Changements"]
+            n_changes = len(changes)
+            summary = ", ".join(f"{k} {v}" for k, v in changes["Changement"].value_counts().items())
+            print(f"🔁 {os.path.basename(stem)} depuis le {previous.created} : {n_changes} changement(s)"
+                  + (f" ({summary})" if summary else ""))
+            if n_changes:
+                export_diff(tables, stem)
+    if SNAPSHOTS or DIFF:
+        snapshot.save(path)
+    return n_changes
+
+
+# =============================
+# 🛰️ SERVICE (modèle en mémoire)
+# =============================
+SERVE_PORT = int(os.environ.get("TMC_SERVE_PORT", "8787"))
+SERVE_REFRESH = int(os.environ.get("TMC_SERVE_REFRESH", "900"))   # secondes entre deux rafraîchissements
+SERVE_MAX_FIRES = 5000                                            # déclenchements renvoyés au plus par requête
+_DAY_NAMES = {name.upper(): i for names in (
+    WEEKDAYS, ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"],
+    ["LUNDI", "MARDI", "MERCREDI", "JEUDI", "VENDREDI", "SAMEDI", "DIMANCHE"],
+) for i, name in enumerate(names)}
+_RE_CLOCK = re.compile(r"^(\d{1,2})(?:[:hH](\d{2})?)?$")
+
+
+class FireIndex:
+    """Index des déclenchements de la semaine de référence, par environnement.
+
+    Pour chaque environnement : minutes de la semaine (0 = lundi 00:00)
+    triées, et pour chacune le groupe (expression CRON, lignes planifiées)
+    qui s'y déclenche. Une fenêtre [début, fin[ se résout par deux
+    recherches dichotomiques (np.searchsorted).
+    """
+
+    def __init__(self, df, start=None):
+        import numpy as np
+        self.start = start or week_start()
+        rows = df[df["Statut"] == STATUS_PLANNED]
+        self.records = [
+            {"environnement": env, "nom": name, "projet": project, "workspace": workspace,
+             "type": kind, "cron": expr, "id": exec_id}
+            for env, name, project, workspace, kind, expr, exec_id in zip(
+                rows["Environnement"].fillna("").tolist(), rows["Nom"].tolist(), rows["Projet"].tolist(),
+                rows["Workspace"].tolist(), rows["Type exécutable"].tolist(), rows["Expression CRON"].tolist(),
+                rows["ID exécutable"].tolist())
+        ]
+        self.groups = []          # (positions des lignes triées par nom, déclenchements par minute)
+        self.minutes, self.group_at = {}, {}
+        per_env = defaultdict(lambda: ([], []))
+        by_key = defaultdict(list)
+        for pos, record in enumerate(self.records):
+            by_key[(record["environnement"], record["cron"])].append(pos)
+        for (env, expr), positions in by_key.items():
+            idx, per_minute = week_fire_minutes(expr, self.start)
+            if not len(idx):
+                continue
+            minutes, group_ids = per_env[env]
+            minutes.append(idx)
+            group_ids.append(np.full(len(idx), len(self.groups), dtype=np.int64))
+            positions.sort(key=lambda pos: self.records[pos]["nom"] or "")
+            self.groups.append((positions, per_minute))
+        # Lignes et déclenchements par occurrence de chaque groupe
+        self.group_rows = np.array([len(positions) for positions, _ in self.groups], dtype=np.int64)
+        self.group_fires = self.group_rows * np.array([n for _, n in self.groups], dtype=np.int64)
+        for env, (minutes, group_ids) in per_env.items():
+            minutes, group_ids = np.concatenate(minutes), np.concatenate(group_ids)
+            order = np.argsort(minutes, kind="stable")
+            self.minutes[env], self.group_at[env] = minutes[order], group_ids[order]
+
+    @property
+    def environments(self):
+        return sorted(self.minutes)
+
+    def _hits(self, windows, envs):
+        """(environnement, minutes, groupes) des déclenchements dans les fenêtres [début, fin[."""
+        import numpy as np
+        for env in envs:
+            minutes, group_at = self.minutes.get(env), self.group_at.get(env)
+            if minutes is None:
+                continue
+            parts = [slice(*np.searchsorted(minutes, [lo, hi])) for lo, hi in windows]
+            yield env, np.concatenate([minutes[p] for p in parts]), np.concatenate([group_at[p] for p in parts])
+
+    def fires(self, windows, envs, limit=SERVE_MAX_FIRES):
+        """Déclenchements détaillés (une entrée par ligne et par minute), triés par minute, environnement et nom.
+
+        Renvoie (entrées, déclenchements, tronqué) : les totaux portent sur
+        toute la fenêtre, seules les `limit` premières entrées sont construites.
+        """
+        import numpy as np
+        hits = list(self._hits(windows, envs))
+        if not hits:
+            return [], 0, False
+        minutes = np.concatenate([m for _, m, _ in hits])
+        group_ids = np.concatenate([g for _, _, g in hits])
+        env_at = np.concatenate([np.full(len(m), i, dtype=np.int64) for i, (_, m, _) in enumerate(hits)])
+        order = np.lexsort((env_at, minutes))
+        minutes, group_ids, env_at = minutes[order].tolist(), group_ids[order].tolist(), env_at[order].tolist()
+
+        fires, i = [], 0
+        while i < len(minutes) and len(fires) < limit:
+            j = i + 1
+            while j < len(minutes) and minutes[j] == minutes[i] and env_at[j] == env_at[i]:
+                j += 1
+            # Même minute, même environnement : les groupes sont fusionnés par nom
+            entries = [(pos, self.groups[g][1]) for g in group_ids[i:j] for pos in self.groups[g][0]]
+            if j - i > 1:
+                entries.sort(key=lambda entry: self.records[entry[0]]["nom"] or "")
+            day, of_day = divmod(minutes[i], 1440)
+            when = {"jour": WEEKDAYS[day], "minute": f"{of_day // 60:02d}:{of_day % 60:02d}",
+                    "minute_semaine": minutes[i]}
+            for pos, per_minute in entries[:limit - len(fires)]:
+                fires.append({**when, **self.records[pos], "declenchements": per_minute})
+            i = j
+        available = int(self.group_rows[group_ids].sum()) if group_ids else 0
+        return fires, int(self.group_fires[group_ids].sum()) if group_ids else 0, available > len(fires)
+
+    def load(self, windows, envs, step=60):
+        """Déclenchements par tranche de `step` minutes de chaque fenêtre."""
+        import numpy as np
+        buckets = []
+        for lo, hi in windows:
+            edges = np.arange(lo, hi + step, step).clip(max=hi)
+            counts = np.zeros(len(edges) - 1, dtype=np.int64)
+            for _, minutes, group_ids in self._hits([(lo, hi)], envs):
+                counts += np.histogram(minutes, bins=edges, weights=self.group_fires[group_ids])[0].astype(np.int64)
+            for begin, n in zip(edges[:-1].tolist(), counts.tolist()):
+                day, of_day = divmod(begin, 1440)
+                buckets.append({"jour": WEEKDAYS[day], "debut": f"{of_day // 60:02d}:{of_day % 60:02d}",
+                                "declenchements": n})
+        return buckets
+
+
+class ScheduleService:
+    """Modèle des schedules gardé en mémoire et rafraîchi en arrière-plan.
+
+    Chaque rafraîchissement relit l'API (le cache disque ne retélécharge que
+    les pages modifiées : 304) et ne reconstruit build_dataframe que pour les
+    workspaces dont les données ont changé (empreinte SHA-1 des réponses).
+    Le modèle (DataFrame + FireIndex) est remplacé d'un bloc : une requête
+    voit toujours un état cohérent. Si les référentiels ne peuvent pas être
+    relus, refresh() lève TMCApiError avant le remplacement et le modèle
+    courant reste servi.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.frames, self.fingerprints = {}, {}
+        self.df, self.index = None, None
+        self.refreshed_at, self.refresh_seconds, self.last_error = None, None, None
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def refresh(self):
+        """Recharge le tenant ; renvoie le nombre de workspaces reconstruits."""
+        import pandas as pd
+        with self.lock:
+            t0 = time.perf_counter()
+            selected, workspace_project_map = load_selection(self.args)
+            if not selected:
+                # Référentiels indisponibles ou sélection vide : le modèle courant reste servi
+                raise TMCApiError("aucun workspace chargé (référentiels indisponibles ou sélection vide)")
+            env_cache = {}
+            prefetch_environments([w["environment_id"] for w in selected], env_cache)
+            rebuilt, frames, fingerprints = 0, {}, {}
+            for w in selected:
+                try:
+                    artifacts = fetch_artifacts(w["workspace_id"])
+                    data = workspace_data(w, env_cache)
+                except TMCApiError as exc:
+                    print(f"⚠️ {w['workspace_name']} – {w['environment_name']} conservé en l'état : {exc}")
+                    if w["workspace_id"] in self.frames:
+                        frames[w["workspace_id"]] = self.frames[w["workspace_id"]]
+                        fingerprints[w["workspace_id"]] = self.fingerprints[w["workspace_id"]]
+                    continue
+                payload = json.dumps([artifacts, *data, workspace_project_map.get(w["workspace_id"])],
+                                     sort_keys=True, default=str)
+                fingerprint = hashlib.sha1(payload.encode()).hexdigest()
+                if self.fingerprints.get(w["workspace_id"]) == fingerprint:
+                    frames[w["workspace_id"]] = self.frames[w["workspace_id"]]
+                else:
+                    df = build_dataframe(artifacts, *data, w["workspace_id"], workspace_project_map)
+                    if not df.empty:
+                        df["Environnement"] = df["Environnement"].mask(
+                            df["Environnement"].fillna("") == "", w["environment_name"])
+                    frames[w["workspace_id"]] = df
+                    rebuilt += 1
+                fingerprints[w["workspace_id"]] = fingerprint
+
+            non_empty = [f for f in frames.values() if not f.empty]
+            df = pd.concat(non_empty, ignore_index=True) if non_empty else pd.DataFrame(
+                columns=["Environnement", "Expression CRON", "Statut"])
+            if (rebuilt or frames.keys() != self.frames.keys()
+                    or self.index is None or self.index.start != week_start()):
+                index = FireIndex(df)
+            else:
+                index = self.index
+            self.frames, self.fingerprints = frames, fingerprints
+            self.df, self.index = df, index
+            self.refreshed_at, self.last_error = datetime.now().isoformat(timespec="seconds"), None
+            self.refresh_seconds = round(time.perf_counter() - t0, 3)
+            print(f"🛰️ Modèle rafraîchi : {len(df)} triggers, {rebuilt}/{len(selected)} workspace(s) "
+                  f"reconstruit(s) en {self.refresh_seconds} s")
+            return rebuilt
+
+    def try_refresh(self):
+        """refresh() sans exception : en cas d'échec, l'erreur est notée et le modèle courant conservé."""
+        try:
+            return self.refresh()
+        except Exception as exc:  # le service garde le dernier modèle valide
+            self.last_error = f"{exc.__class__.__name__}: {exc}"
+            print(f"❌ Rafraîchissement en échec : {self.last_error}")
+            return None
+
+    def refresh_loop(self, interval):
+        while not self.stop.wait(interval):
+            self.try_refresh()
+
+    # ----- Requêtes -----
+    def _envs(self, query):
+        wanted = query.get("env")
+        envs = self.index.environments
+        if not wanted:
+            return envs
+        return [e for e in envs if _matches([wanted], e)]
+
+    def status(self, query=None):
+        return {
+            "refreshed_at": self.refreshed_at, "refresh_seconds": self.refresh_seconds,
+            "last_error": self.last_error, "triggers": 0 if self.df is None else len(self.df),
+            "workspaces": len(self.frames), "week_start": self.index and self.index.start.isoformat(),
+            "environments": self.index.environments if self.index else [],
+        }
+
+    def fires(self, query):
+        index = self.index
+        limit = int(query.get("limit", SERVE_MAX_FIRES))
+        fires, total, truncated = index.fires(_query_windows(query), self._envs(query), limit)
+        return {"week_start": index.start.isoformat(), "declenchements": total, "lignes": len(fires),
+                "tronque": truncated, "fires": fires}
+
+    def load(self, query):
+        index = self.index
+        step = max(1, int(query.get("step", 60)))
+        return {"week_start": index.start.isoformat(), "step": step,
+                "buckets": index.load(_query_windows(query), self._envs(query), step)}
+
+    def schedules(self, query):
+        df = self.df
+        mask = df["Nom"].astype(str).map(lambda n: _matches([query["name"]], n)) if query.get("name") else None
+        rows = df[mask] if mask is not None else df
+        if query.get("env"):
+            rows = rows[rows["Environnement"].fillna("").map(lambda e: _matches([query["env"]], e))]
+        limit = int(query.get("limit", SERVE_MAX_FIRES))
+        return {"total": len(rows), "schedules": json.loads(rows.head(limit).to_json(orient="records", force_ascii=False))}
+
+
+def _clock(value, default):
+    """« 2 », « 02:30 », « 2h30 » → minutes depuis minuit."""
+    if not value:
+        return default
+    match = _RE_CLOCK.match(value.strip())
+    if not match or int(match.group(1)) > 24:
+        raise ValueError(f"heure invalide : {value}")
+    return min(1440, int(match.group(1)) * 60 + int(match.group(2) or 0))
+
+
+def _query_windows(query):
+    """Fenêtres [début, fin[ en minutes de la semaine pour `day`, `from`, `to` (tous les jours si `day` absent)."""
+    lo, hi = _clock(query.get("from"), 0), _clock(query.get("to"), 1440)
+    if "day" in query:
+        day = query["day"].strip().upper()
+        if day.isdigit() and int(day) < 7:
+            days = [int(day)]
+        elif day in _DAY_NAMES:
+            days = [_DAY_NAMES[day]]
+        else:
+            raise ValueError(f"jour invalide : {query['day']}")
+    else:
+        days = range(7)
+    if hi <= lo:
+        raise ValueError("`to` doit être postérieur à `from`")
+    return [(d * 1440 + lo, d * 1440 + hi) for d in days]
+
+
+def _service_handler(service):
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qs
+
+    routes = {"/health": service.status, "/fires": service.fires, "/load": service.load,
+              "/schedules": service.schedules}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            route = routes.get(url.path)
+            if route is None:
+                return self._send(404, {"error": f"route inconnue : {url.path}", "routes": sorted(routes)})
+            if service.index is None:
+                return self._send(503, {"error": "modèle en cours de chargement"})
+            try:
+                self._send(200, route(query))
+            except ValueError as exc:
+                self._send(400, {"error": str(exc)})
+
+        def do_POST(self):
+            if urlsplit(self.path).path != "/refresh":
+                return self._send(404, {"error": "seul POST /refresh est accepté"})
+            rebuilt = service.try_refresh()
+            if rebuilt is None:
+                return self._send(503, {"error": service.last_error, **service.status()})
+            self._send(200, {"rebuilt": rebuilt, **service.status()})
+
+    return Handler
+
+
+def serve_main(argv):
+    """Sous-commande `serve` : charge le modèle, le rafraîchit en tâche de fond et répond en HTTP/JSON."""
+    from http.server import ThreadingHTTPServer
+    parser = build_parser()
+    parser.prog = f"{parser.prog} serve"
+    srv = parser.add_argument_group("service")
+    srv.add_argument("--host", default="127.0.0.1", help="adresse d'écoute")
+    srv.add_argument("--port", type=int, default=SERVE_PORT, help="port HTTP")
+    srv.add_argument("--refresh", type=int, default=SERVE_REFRESH, metavar="SECONDES",
+                     help="intervalle de rafraîchissement du modèle (0 = jamais)")
+    args = parser.parse_args(argv)
+    args.no_input = True
+    if args.refresh:
+        # Au-delà de l'intervalle, chaque réponse est revalidée (304 si inchangée)
+        args.cache_ttl = min(args.cache_ttl, args.refresh)
+    error = configure(args)
+    if error:
+        return error
+
+    service = ScheduleService(args)
+    service.try_refresh()
+    if not service.frames:
+        print("❌ Aucun workspace chargé : vérifier --workspace / --environment / --all.")
+        return EXIT_FAILURE
+    if args.refresh:
+        threading.Thread(target=service.refresh_loop, args=(args.refresh,), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), _service_handler(service))
+    server.daemon_threads = True
+    print(f"🛰️ Service prêt sur http://{args.host}:{server.server_address[1]} "
+          "(GET /health, /fires, /load, /schedules ; POST /refresh)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop.set()
+        server.server_close()
+    return EXIT_OK
+
+
+# =============================
+# 🚀 MAIN
+# =============================
+EXIT_OK, EXIT_FAILURE, EXIT_PARTIAL = 0, 1, 3   # 2 = erreur de ligne de commande (argparse)
+WORKSPACE_WORKERS = 4
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Export des Schedules Talend Cloud (TMC) vers Excel / Parquet / CSV / JSONL.",
+        epilog="Sans filtre ni --all, la sélection des workspaces est demandée interactivement. "
+               "Sous-commandes : `translate <cron>…` (traduction CRON seule, sans token ni appel API), "
+               "`serve` (modèle en mémoire interrogeable en HTTP/JSON). "
+               f"Codes retour : {EXIT_OK} = succès, {EXIT_FAILURE} = échec, {EXIT_PARTIAL} = échec partiel, "
+               "2 = ligne de commande invalide.",
+    )
+    sel = parser.add_argument_group("sélection")
+    sel.add_argument("-w", "--workspace", action="append", default=[], metavar="MOTIF",
+                     help="workspace à exporter : nom, ID ou regex (répétable)")
+    sel.add_argument("-e", "--environment", action="append", default=[], metavar="MOTIF",
+                     help="environnement à exporter : nom, ID ou regex (répétable)")
+    sel.add_argument("-a", "--all", action="store_true", help="exporter tous les workspaces")
+    sel.add_argument("--no-input", action="store_true",
+                     help="ne jamais interroger l'utilisateur (implicite hors terminal)")
+
+    out = parser.add_argument_group("sortie")
+    out.add_argument("-o", "--output-dir", default=OUTPUT_DIR, help="répertoire des fichiers générés")
+    out.add_argument("-f", "--format", default=",".join(FORMATS),
+                     help="formats séparés par des virgules : xlsx, parquet, csv, jsonl")
+    out.add_argument("--consolidated", action="store_true", default=CONSOLIDATED,
+                     help="un seul fichier pour tous les workspaces sélectionnés")
+    out.add_argument("--streaming", action="store_true", default=STREAMING,
+                     help="export Excel en flux, mémoire indépendante du nombre de lignes (ignoré avec --smooth ou --history)")
+    out.add_argument("--durations", default=DURATIONS_FILE, metavar="CSV",
+                     help="durées moyennes (Nom;Durée en minutes) pour la concurrence estimée")
+    out.add_argument("--diff", action="store_true", default=DIFF,
+                     help="n'exporter que les changements depuis le snapshot précédent")
+    out.add_argument("--no-snapshot", action="store_true", default=not SNAPSHOTS,
+                     help="ne pas enregistrer le snapshot <fichier>.snapshot.json.gz de l'export")
+
+    api = parser.add_argument_group("API")
+    api.add_argument("--base-url", default=BASE, help="URL de l'API Talend Cloud")
+    api.add_argument("--concurrency", type=int, default=MAX_WORKERS, help="requêtes API simultanées max")
+    api.add_argument("--rate", type=float, default=RATE_LIMIT, help="requêtes / seconde (0 = illimité)")
+    api.add_argument("--workspace-workers", type=int, default=WORKSPACE_WORKERS,
+                     help="workspaces traités en parallèle")
+
+    cache = parser.add_argument_group("cache")
+    cache.add_argument("--cache", default=CACHE_PATH, metavar="FICHIER", help="cache SQLite des réponses")
+    cache.add_argument("--no-cache", action="store_true", help="désactive le cache disque")
+    cache.add_argument("--cache-ttl", type=int, default=CACHE_TTL, metavar="SECONDES",
+                       help="sert les réponses en cache sans revalidation pendant N secondes "
+                            "(0 par défaut : chaque run revalide, les données ne sont jamais périmées)")
+    cache.add_argument("--offline", action="store_true", default=OFFLINE,
+                       help="aucun appel API : reconstruit les exports depuis le cache")
+
+    hist = parser.add_argument_group("historique d'exécution")
+    hist.add_argument("--history", type=int, default=HISTORY_DAYS, metavar="JOURS",
+                      help="durées réelles des N derniers jours : onglets Durées et Occupation (0 = désactivé)")
+    hist.add_argument("--history-percentile", type=float, default=HISTORY_PERCENTILE, metavar="P",
+                      help="percentile de durée retenu pour l'occupation des moteurs")
+
+    aff = parser.add_argument_group("affluence")
+    aff.add_argument("--horizon", type=int, default=HORIZON_DAYS, metavar="JOURS",
+                     help="jours couverts par les onglets d'affluence (ex. 28 ou 31 pour les triggers mensuels)")
+    aff.add_argument("--horizon-start", default=HORIZON_START, metavar="AAAA-MM-JJ",
+                     help="premier jour de l'horizon (défaut : lundi de la semaine courante)")
+
+    smooth = parser.add_argument_group("lissage des pics")
+    smooth.add_argument("--smooth", action="store_true", default=SMOOTHING,
+                        help="propose des décalages de CRON qui aplanissent les pics (onglets Lissage, Affluence lissée)")
+    smooth.add_argument("--smooth-window", type=int, default=SMOOTH_WINDOW, metavar="MINUTES",
+                        help="décalage maximal, avant ou après l'heure actuelle")
+    smooth.add_argument("--smooth-step", type=int, default=SMOOTH_STEP, metavar="MINUTES",
+                        help="granularité des décalages")
+    smooth.add_argument("--smooth-hours", default=SMOOTH_HOURS, metavar="PLAGES",
+                        help="heures autorisées pour les horaires proposés, ex. 20-6 ou 0-5,22,23")
+    smooth.add_argument("--smooth-categories", default=",".join(SMOOTH_CATEGORIES), metavar="CATÉGORIES",
+                        help="catégories déplaçables, séparées par des virgules")
+    smooth.add_argument("--smooth-freeze", action="append", default=[], metavar="MOTIF",
+                        help="tâche à ne jamais déplacer : nom, ID ou regex (répétable)")
+
+    diag = parser.add_argument_group("diagnostic")
+    diag.add_argument("--report", default=REPORT_FILE, metavar="JSON",
+                      help="rapport du run : durée par phase, métriques par endpoint, pagination, caches")
+    diag.add_argument("--profile", default=PROFILE_FILE, metavar="FICHIER",
+                      help="profile le run avec cProfile (statistiques pstats)")
+    return parser
+
+
+def parse_args(argv=None):
+    return build_parser().parse_args(argv)
+
+
+def _matches(patterns, *values):
+    """Vrai si une valeur (nom ou ID) est égale à un motif ou le vérifie en regex (insensible à la casse)."""
+    for pattern in patterns:
+        for value in values:
+            value = value or ""
+            try:
+                if value == pattern or re.fullmatch(pattern, value, re.IGNORECASE):
+                    return True
+            except re.error:
+                continue
+    return False
+
+
+def select_workspaces(workspaces, args):
+    """Workspaces retenus par les filtres, --all ou la saisie interactive (None = sélection impossible)."""
+    if args.workspace or args.environment:
+        return [
+            w for w in workspaces
+            if (not args.workspace or _matches(args.workspace, w["workspace_name"], w["workspace_id"]))
+            and (not args.environment or _matches(args.environment, w["environment_name"], w["environment_id"]))
+        ]
+    if args.all:
+        return workspaces
+    if args.no_input or not sys.stdin.isatty():
+        print("❌ Aucune sélection : utiliser --workspace, --environment ou --all en mode non interactif.")
+        return None
 
     print("Sélectionne les workspaces à exporter :")
     for i, w in enumerate(workspaces, start=1):
@@ -492,29 +2289,223 @@ if __name__ == "__main__":
 
     choice = input("\n👉 Entre les numéros séparés par des virgules (ex: 1,3) ou * pour tout : ").strip()
     if choice == "*":
-        selected = workspaces
-    else:
-        try:
-            idx = [int(x.strip()) for x in choice.split(",") if x.strip().isdigit()]
-            selected = [workspaces[i - 1] for i in idx if 0 < i <= len(workspaces)]
-        except Exception:
-            selected = []
+        return workspaces
+    try:
+        idx = [int(x.strip()) for x in choice.split(",") if x.strip().isdigit()]
+        return [workspaces[i - 1] for i in idx if 0 < i <= len(workspaces)]
+    except Exception:
+        return []
 
-    print(f"\n🧭 {len(selected)} workspace(s) sélectionné(s).\n")
 
-    for w in selected:
-        project = w["workspace_name"]
-        env = w["environment_name"]
-        ws_id = w["workspace_id"]
-        print(f"🏗️ Traitement du projet {project} – {env}...")
+def process_workspace(w, env_cache, workspace_project_map):
+    """Exporte un workspace ; renvoie (succès, DataFrame à consolider ou None).
 
-        artifacts = fetch_artifacts(ws_id)
-        schedules = fetch_schedules(w["environment_id"])
-        tasks = fetch_tasks(w["environment_id"])
-        plans = fetch_plans(w["environment_id"])
+    Toute erreur est limitée au workspace (échec partiel) : les autres
+    workspaces sont exportés et le code retour en tient compte.
+    """
+    try:
+        return _process_workspace(w, env_cache, workspace_project_map)
+    except Exception as exc:
+        print(f"❌ Export en échec pour {w['workspace_name']} – {w['environment_name']} : "
+              f"{exc.__class__.__name__}: {exc}")
+        return False, None
 
-        df = build_dataframe(artifacts, schedules, tasks, plans, ws_id, workspace_project_map)
-        if not df.empty:
-            export_excel(df, project, env)
+
+def _process_workspace(w, env_cache, workspace_project_map):
+    project = w["workspace_name"]
+    env = w["environment_name"]
+    ws_id = w["workspace_id"]
+    print(f"🏗️ Traitement du projet {project} – {env}...")
+
+    try:
+        with METRICS.phase("données workspace"):
+            artifacts = fetch_artifacts(ws_id)
+            schedules, tasks, plans = workspace_data(w, env_cache)
+    except TMCApiError as exc:
+        print(f"❌ Export ignoré pour {project} – {env} : {exc}")
+        return False, None
+
+    if DIFF and not CONSOLIDATED:
+        # Le diff ne relit que les snapshots : les lignes sont hachées au fil de l'eau
+        snapshot = Snapshot()
+        with METRICS.phase("lignes (flux)"):
+            for row in iter_schedule_rows(artifacts, schedules, tasks, plans, ws_id, workspace_project_map):
+                snapshot.add(row)
+        record_snapshot(snapshot, _output_stem(project, env))
+        return True, None
+
+    if STREAMING and FORMATS == ["xlsx"] and not CONSOLIDATED:
+        rows = iter_schedule_rows(artifacts, schedules, tasks, plans, ws_id, workspace_project_map)
+        snapshot = Snapshot()
+        if SNAPSHOTS:
+            rows = snapshot.recording(rows)
+        first = next(rows, None)
+        if first is not None:
+            with METRICS.phase("export xlsx (flux)"):
+                export_excel_streaming(chain([first], rows), project, env)
+            if SNAPSHOTS:
+                record_snapshot(snapshot, _output_stem(project, env))
         else:
             print(f"⚠️ Aucun schedule trouvé pour {project} – {env}")
+        return True, None
+
+    with METRICS.phase("build_dataframe"):
+        df = build_dataframe(artifacts, schedules, tasks, plans, ws_id, workspace_project_map)
+    if df.empty:
+        print(f"⚠️ Aucun schedule trouvé pour {project} – {env}")
+        return True, None
+    if CONSOLIDATED:
+        # Triggers sans artefact rattaché : l'environnement du workspace reste connu
+        df["Environnement"] = df["Environnement"].mask(df["Environnement"].fillna("") == "", env)
+        return True, df
+    export_outputs(df, project, env)
+    if SNAPSHOTS:
+        record_snapshot(Snapshot.from_frame(df), _output_stem(project, env))
+    return True, None
+
+
+def main(argv=None):
+    """Point d'entrée : `translate <cron>…` ou `[export] [options]` (défaut).
+
+    L'export tourne sous cProfile si demandé et écrit le rapport du run.
+    """
+    global METRICS, _PROFILERS
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["translate"]:
+        return translate_main(argv[1:])
+    if argv[:1] == ["serve"]:
+        return serve_main(argv[1:])
+    if argv[:1] == ["export"]:
+        argv = argv[1:]
+    args = parse_args(argv)
+    METRICS = RunMetrics()
+    exit_code = EXIT_FAILURE
+    try:
+        if args.profile:
+            import cProfile
+            import pstats
+            _PROFILERS = [cProfile.Profile()]
+            exit_code = _PROFILERS[0].runcall(run, args)
+            stats = pstats.Stats(*_PROFILERS)
+            stats.dump_stats(args.profile)
+            print(f"🔬 Profil cProfile : {args.profile} (20 fonctions les plus coûteuses, tous threads)")
+            stats.sort_stats("cumulative").print_stats(20)
+        else:
+            exit_code = run(args)
+        return exit_code
+    finally:
+        _PROFILERS = None
+        if args.report:
+            METRICS.write(args.report, argv=argv, exit_code=exit_code)
+
+
+def configure(args):
+    """Applique les options au module ; renvoie EXIT_FAILURE si elles sont invalides, sinon None."""
+    global BASE, STREAMING, FORMATS, CONSOLIDATED, OUTPUT_DIR, DURATIONS_FILE, SNAPSHOTS, DIFF
+    global HISTORY_DAYS, HISTORY_PERCENTILE
+    global SMOOTHING, SMOOTH_WINDOW, SMOOTH_STEP, SMOOTH_HOURS, SMOOTH_CATEGORIES, SMOOTH_FREEZE
+    global HORIZON_DAYS, HORIZON_START
+    BASE = args.base_url.rstrip("/")
+    SNAPSHOTS, DIFF = not args.no_snapshot, args.diff
+    HISTORY_DAYS, HISTORY_PERCENTILE = args.history, args.history_percentile
+    STREAMING, CONSOLIDATED, DURATIONS_FILE = args.streaming, args.consolidated, args.durations
+    FORMATS = [f.strip().lower() for f in args.format.split(",") if f.strip()]
+    unknown = set(FORMATS) - {"xlsx", "parquet", "csv", "jsonl"}
+    if unknown:
+        print(f"❌ Format(s) inconnu(s) : {', '.join(sorted(unknown))}")
+        return EXIT_FAILURE
+    HORIZON_DAYS, HORIZON_START = args.horizon, args.horizon_start
+    try:
+        horizon()
+    except ValueError:
+        print(f"❌ --horizon-start : date invalide (AAAA-MM-JJ attendu) : {HORIZON_START}")
+        return EXIT_FAILURE
+    if HORIZON_DAYS < 1:
+        print("❌ --horizon doit couvrir au moins 1 jour")
+        return EXIT_FAILURE
+    SMOOTHING, SMOOTH_WINDOW, SMOOTH_STEP = args.smooth, args.smooth_window, args.smooth_step
+    SMOOTH_CATEGORIES = [c.strip() for c in args.smooth_categories.split(",") if c.strip()]
+    SMOOTH_HOURS, SMOOTH_FREEZE = args.smooth_hours, args.smooth_freeze
+    try:
+        _hour_set(SMOOTH_HOURS)
+    except ValueError as exc:
+        print(f"❌ --smooth-hours : {exc}")
+        return EXIT_FAILURE
+    if SMOOTH_STEP < 1:
+        print("❌ --smooth-step doit être d'au moins 1 minute")
+        return EXIT_FAILURE
+    if STREAMING and (SMOOTHING or HISTORY_DAYS):
+        # Lissage et historique travaillent sur le DataFrame complet : pas de flux
+        print("ℹ️ --streaming ignoré : --smooth et --history nécessitent l'export en mémoire")
+        STREAMING = False
+    OUTPUT_DIR = args.output_dir
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    configure_fetch(args.concurrency, args.rate)
+    configure_cache("" if args.no_cache else args.cache, args.cache_ttl, args.offline)
+    return None
+
+
+def load_selection(args):
+    """Référentiels, mapping et workspaces retenus : (sélection, workspace → projet), sélection vide en cas d'échec."""
+    try:
+        with METRICS.phase("référentiels"):
+            projects = fetch_projects()
+            workspaces = fetch_workspaces()
+    except TMCApiError as exc:
+        print(f"❌ Référentiels TMC indisponibles : {exc}")
+        return [], {}
+    with METRICS.phase("mapping"):
+        workspace_project_map = map_workspaces_to_projects(workspaces, projects)
+
+    selected = select_workspaces(workspaces, args)
+    if selected is not None:
+        print(f"\n🧭 {len(selected)} workspace(s) sélectionné(s).\n")
+    return selected or [], workspace_project_map
+
+
+def run(args):
+    """Exporte les workspaces sélectionnés ; renvoie le code retour."""
+    import pandas as pd
+    error = configure(args)
+    if error:
+        return error
+
+    print("🚀 Export Talend Cloud Schedules – NextDecision Edition v3.5\n")
+    if OFFLINE:
+        print(f"📴 Mode hors-ligne : lecture seule du cache {CACHE_PATH}\n")
+
+    selected, workspace_project_map = load_selection(args)
+    if not selected:
+        return EXIT_FAILURE
+
+    env_cache = {}
+    with METRICS.phase("données environnements"):
+        prefetch_environments([w["environment_id"] for w in selected], env_cache)
+    with METRICS.phase("workspaces"), ThreadPoolExecutor(max_workers=max(1, args.workspace_workers)) as pool:
+        results = list(pool.map(lambda w: _profiled(process_workspace)(w, env_cache, workspace_project_map), selected))
+
+    consolidated = [df for _, df in results if df is not None]
+    if consolidated:
+        with METRICS.phase("consolidation"):
+            combined = pd.concat(consolidated, ignore_index=True)
+        print(f"🌐 Consolidation : {len(combined)} triggers, "
+              f"{combined['Environnement'].nunique()} environnement(s)")
+        stem = os.path.join(OUTPUT_DIR, CONSOLIDATED_STEM)
+        try:
+            if not DIFF:
+                export_outputs(combined, "", "", stem=stem, consolidated=True)
+            if DIFF or SNAPSHOTS:
+                record_snapshot(Snapshot.from_frame(combined), stem)
+        except Exception as exc:
+            print(f"❌ Export consolidé en échec : {exc.__class__.__name__}: {exc}")
+            return EXIT_FAILURE
+
+    failures = sum(1 for ok, _ in results if not ok)
+    if failures:
+        print(f"⚠️ {failures}/{len(selected)} workspace(s) en échec.")
+        return EXIT_FAILURE if failures == len(selected) else EXIT_PARTIAL
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Benchmarks de TMC_schedule (aucun appel à l'API Talend Cloud).
+
+Micro-benchmarks CRON, puis pipeline complet contre le faux serveur
+mock_tmc_api : fetch, build_dataframe, readable_cron et export_excel.
+
+Usage : python bench_tmc.py [--triggers N] [--distinct K] [--scale X] [--latency S] [--concurrency 1,4,8,16]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("TMC_TOKEN", "bench")
+os.environ.setdefault("TMC_CACHE", "")
+
+import pandas as pd
+
+import TMC_schedule as tmc
+import mock_tmc_api
+
+# Formes rencontrées sur le tenant : quelques dizaines d'expressions distinctes
+CRON_SAMPLES = [
+    "*/15 7-18 ? * 2-6", "*/17 8-19 ? * 2,3,4,5,6", "0,30 8-17 ? * 2,3,4,5,6",
+    "0,10,20,30,40,50 5,6,7,8,9,10 ? * *", "0 9,14,21 ? * *", "15 8,12,16 ? * 1-5",
+    "20 5 ? * 2-6", "0 2 ? * *", "30 4 ? * 2-6 *", "00 20 * * ?", "3,8,13 * * * ?",
+    "00 8 1-31 1-12 ?", "00 10 29 3,6,9,12 ? *", "*/5 * * * * ?", "5 0 L * ?", "5 0 LW * ?",
+]
+
+
+# =============================
+# 🕒 CRON
+# =============================
+def cron_corpus(n_triggers, n_distinct, seed=42):
+    """Liste de `n_triggers` expressions tirées parmi `n_distinct` variantes."""
+    rnd = random.Random(seed)
+    distinct = []
+    for i in range(n_distinct):
+        parts = CRON_SAMPLES[i % len(CRON_SAMPLES)].split()
+        if parts[0].isdigit():
+            parts[0] = str((int(parts[0]) + i // len(CRON_SAMPLES)) % 60)
+        distinct.append(" ".join(parts))
+    return [rnd.choice(distinct) for _ in range(n_triggers)]
+
+
+def _translate_uncached(expr):
+    desc = tmc.readable_cron.__wrapped__(expr)
+    return tmc.classify_schedule.__wrapped__(desc), tmc.hour_from_cron.__wrapped__(expr)
+
+
+def _translate_cached(expr):
+    desc = tmc.readable_cron(expr)
+    return tmc.classify_schedule(desc), tmc.hour_from_cron(expr)
+
+
+def bench_cron(n_triggers, n_distinct, repeat=5):
+    corpus = cron_corpus(n_triggers, n_distinct)
+    print(f"🕒 readable_cron + classify_schedule + hour_from_cron — {n_triggers} triggers, {n_distinct} CRON distincts")
+    for label, fn in (("sans mémoïsation", _translate_uncached), ("avec mémoïsation", _translate_cached)):
+        for f in (tmc.readable_cron, tmc.classify_schedule, tmc.hour_from_cron):
+            f.cache_clear()
+        best = min(timeit.repeat(lambda: [fn(c) for c in corpus], number=1, repeat=repeat))
+        print(f"  {label:<18} {best * 1e3:8.1f} ms  ({best / n_triggers * 1e6:6.2f} µs / trigger)")
+
+
+def bench_expansion(n_triggers, n_distinct, days=tmc.AFFLUENCE_DAYS, repeat=5):
+    corpus = cron_corpus(n_triggers, n_distinct)
+    start = tmc.week_start()
+    print(f"🧮 cron_fire_profile — {n_triggers} triggers, {n_distinct} CRON distincts, horizon {days} j")
+    for label, fn in (("sans mémoïsation", tmc.cron_fire_profile.__wrapped__), ("avec mémoïsation", tmc.cron_fire_profile)):
+        tmc.cron_fire_profile.cache_clear()
+        tmc.parse_cron.cache_clear()
+        best = min(timeit.repeat(lambda: [fn(c, start, days) for c in corpus], number=1, repeat=repeat))
+        print(f"  {label:<18} {best * 1e3:8.1f} ms  ({best / n_triggers * 1e6:6.2f} µs / trigger)")
+
+
+# =============================
+# 🧪 PIPELINE (faux serveur TMC)
+# =============================
+def _timed(fn, *args):
+    """(résultat, secondes) ; les traces [GET] du script sont masquées."""
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def fetch_tenant(workspace_workers=tmc.WORKSPACE_WORKERS):
+    """Même séquence d'appels que TMC_schedule.run : référentiels, environnements, artefacts."""
+    tmc.fetch_projects()
+    workspaces = tmc.fetch_workspaces()
+    env_cache = {}
+    tmc.prefetch_environments([w["environment_id"] for w in workspaces], env_cache)
+    with ThreadPoolExecutor(max_workers=workspace_workers) as pool:
+        artifacts = list(pool.map(lambda w: tmc.fetch_artifacts(w["workspace_id"]), workspaces))
+    return [(w, a, *tmc.workspace_data(w, env_cache)) for w, a in zip(workspaces, artifacts)]
+
+
+def bench_fetch(server, concurrencies):
+    print(f"🌐 fetch — latence {server.latency * 1e3:.0f} ms (+ jitter {server.jitter * 1e3:.0f} ms)")
+    data = None
+    for total in (True, False):
+        server.total = total
+        strategy = "pages d'un coup (total)" if total else "lots de 1, 2, 4… pages"
+        for concurrency in concurrencies:
+            tmc.configure_fetch(concurrency, 0)
+            before = server.requests
+            data, elapsed = _timed(fetch_tenant)
+            print(f"  {strategy:<26} concurrence {concurrency:>3}  {elapsed:7.2f} s"
+                  f"  ({server.requests - before} requêtes)")
+    server.total = True
+    return data
+
+
+def bench_pipeline(scale, latency, concurrencies):
+    tenant = mock_tmc_api.synthetic_tenant(workspaces=int(40 * scale))
+    size = mock_tmc_api.tenant_size(tenant)
+    print(f"\n🧪 Pipeline — tenant synthétique ×{scale:g} : {size['workspaces']} workspaces, "
+          f"{size['schedules']} schedules, {size['triggers']} triggers")
+    server = mock_tmc_api.serve(tenant, latency=latency, jitter=latency / 2)
+    tmc.BASE = server.url
+    try:
+        data = bench_fetch(server, concurrencies)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(data) == size["workspaces"], f"{len(data)}/{size['workspaces']} workspaces récupérés"
+    project_map = {w["workspace_id"]: w["workspace_name"].upper() for w, *_ in data}
+    for f in (tmc.readable_cron, tmc.classify_schedule, tmc.hour_from_cron):
+        f.cache_clear()
+    frames, elapsed = _timed(lambda: [
+        tmc.build_dataframe(artifacts, schedules, tasks, plans, w["workspace_id"], project_map)
+        for w, artifacts, schedules, tasks, plans in data
+    ])
+    df = pd.concat(frames, ignore_index=True)
+    print(f"📊 build_dataframe      {elapsed:7.2f} s  ({len(df)} lignes, caches CRON froids)")
+
+    crons = df["Expression CRON"].tolist()
+    tmc.readable_cron.cache_clear()
+    _, elapsed = _timed(lambda: [tmc.readable_cron(c) for c in crons])
+    print(f"🕒 readable_cron        {elapsed:7.3f} s  ({len(crons)} triggers, "
+          f"{tmc.readable_cron.cache_info().currsize} distincts)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, elapsed = _timed(tmc.export_excel, df, "", "", os.path.join(tmp, "bench"))
+    print(f"💾 export_excel         {elapsed:7.2f} s  (Schedules + synthèses)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--triggers", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=40)
+    parser.add_argument("--scale", type=float, default=1.0, help="taille du tenant (×40 workspaces de 55 exécutables)")
+    parser.add_argument("--latency", type=float, default=0.02, help="latence simulée par requête (s)")
+    parser.add_argument("--concurrency", default="1,4,8,16", help="concurrences de fetch à comparer")
+    parser.add_argument("--skip-pipeline", action="store_true", help="micro-benchmarks CRON seulement")
+    args = parser.parse_args()
+    bench_cron(args.triggers, args.distinct)
+    bench_expansion(args.triggers, args.distinct)
+    if not args.skip_pipeline:
+        bench_pipeline(args.scale, args.latency, [int(c) for c in args.concurrency.split(",") if c.strip()])
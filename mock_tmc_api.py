@@ -0,0 +1,254 @@
+"""Faux serveur de l'API Talend Cloud (TMC) pour tests et benchmarks hors-ligne.
+
+Sert un tenant synthétique sur les endpoints utilisés par TMC_schedule :
+/orchestration/projects, /workspaces, /schedules, /executables/tasks,
+/executables/plans, /artifacts et l'historique
+/processing/executables/{tasks,plans}/{id}/executions, avec pagination
+`limit`/`offset`, champ `total`, ETag / 304 et latence simulée.
+
+Usage : python mock_tmc_api.py [--port 8765] [--workspaces 40] [--latency 0.05]
+        puis : python TMC_schedule.py --base-url http://127.0.0.1:8765 --all
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ENVIRONMENTS = ["DEV", "REC", "PREPROD", "PROD"]
+DOMAINS = ["Finance", "RH", "Ventes", "Logistique", "Achats", "Marketing", "Clients", "Produits", "Stocks", "Paie"]
+CRON_TEMPLATES = [
+    "{m} {h} ? * *", "{m} {h} ? * 2-6", "*/15 7-18 ? * 2-6", "0,30 8-17 ? * 2,3,4,5,6",
+    "{m} {h},{h2} ? * *", "{m} {h} ? * 2", "{m} {h} 1 * ?", "{m} {h} L * ?", "*/5 * * * ?",
+    "{m} {h} ? * MON#1", "{m} {h} 15W * ?", "{m} */2 ? * *", "",
+]
+DEFAULT_LIMIT = 100
+_RE_EXECUTIONS = re.compile(r"^/processing/executables/(tasks|plans)/([^/]+)/executions$")
+
+
+# =============================
+# 🏭 TENANT SYNTHÉTIQUE
+# =============================
+def _cron(rnd):
+    h = rnd.choice([0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 18, 20, 22, 23])
+    return rnd.choice(CRON_TEMPLATES).format(m=rnd.choice([0, 0, 0, 5, 15, 30, 45]), h=h, h2=(h + 12) % 24)
+
+
+def synthetic_tenant(environments=4, workspaces=40, tasks=50, plans=5, triggers=2, paused=0.1,
+                     shared=0.05, seed=42):
+    """Tenant reproductible : `workspaces` répartis sur `environments`, `tasks` et `plans` par workspace.
+
+    Chaque exécutable a un schedule de 1 à `triggers` triggers ; `paused` est
+    la part d'exécutables en pause, `shared` la part de tasks sans workspace
+    (partagées au niveau de l'environnement).
+    """
+    rnd = random.Random(seed)
+    envs = [{"id": f"env-{i:04d}", "name": ENVIRONMENTS[i] if i < len(ENVIRONMENTS) else f"ENV{i}"}
+            for i in range(environments)]
+    tenant = {key: [] for key in ("projects", "workspaces", "artifacts", "tasks", "plans", "schedules")}
+    projects = {}
+
+    for i in range(workspaces):
+        d = i // environments  # chaque domaine existe dans tous les environnements
+        domain = f"{DOMAINS[d % len(DOMAINS)]}{'' if d < len(DOMAINS) else d // len(DOMAINS)}"
+        env = envs[i % environments]
+        ws = {"id": f"ws-{i:05d}", "name": domain, "environment": env}
+        tenant["workspaces"].append(ws)
+        if domain.upper() not in projects:
+            projects[domain.upper()] = {"id": f"prj-{len(projects):05d}", "name": domain.upper()}
+
+        for t in range(tasks):
+            art = {"id": f"art-{i:05d}-{t:04d}", "name": f"j_{domain.lower()}_{t:04d}",
+                   "workspace": {"id": ws["id"], "environment": env}}
+            tenant["artifacts"].append(art)
+            task = {"id": f"task-{i:05d}-{t:04d}", "name": f"{domain}_T{t:04d}", "artifactId": art["id"],
+                    "environmentId": env["id"], "taskPauseDetails": {"pause": rnd.random() < paused}}
+            if rnd.random() >= shared:
+                task["workspace"] = {"id": ws["id"]}
+            tenant["tasks"].append(task)
+        for p in range(plans):
+            tenant["plans"].append({"id": f"plan-{i:05d}-{p:03d}", "name": f"{domain}_PLAN{p:03d}",
+                                    "environmentId": env["id"], "workspace": {"id": ws["id"]},
+                                    "planPauseDetails": {"pause": rnd.random() < paused}})
+
+    for kind, items in (("TASK", tenant["tasks"]), ("PLAN", tenant["plans"])):
+        for item in items:
+            tenant["schedules"].append({
+                "id": f"sch-{item['id']}", "executableId": item["id"], "executableType": kind,
+                "environmentId": item["environmentId"],
+                "triggers": [{"type": "CRON", "cronExpression": _cron(rnd)}
+                             for _ in range(rnd.randint(1, triggers))],
+            })
+    rnd.shuffle(tenant["schedules"])
+    tenant["projects"] = list(projects.values())
+    return tenant
+
+
+def synthetic_executions(exec_id, window_start, window_end, runs_per_day=1):
+    """Historique reproductible d'un exécutable : durée type tirée de son ID, ±30 % d'une exécution à l'autre."""
+    rnd = random.Random(exec_id)
+    typical = rnd.choice([0.5, 1, 2, 5, 10, 20, 45, 90])
+    start = datetime.fromisoformat(window_start.replace("Z", "+00:00"))
+    end = datetime.fromisoformat(window_end.replace("Z", "+00:00"))
+    executions = []
+    day = start
+    while day < end:
+        for _ in range(runs_per_day):
+            begin = day + timedelta(minutes=rnd.randrange(24 * 60))
+            minutes = typical * rnd.uniform(0.7, 1.3)
+            executions.append({
+                "executionId": f"exe-{exec_id}-{len(executions):05d}",
+                "executionStatus": "EXECUTION_SUCCESS" if rnd.random() > 0.05 else "EXECUTION_FAILED",
+                "startTimestamp": begin.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                "finishTimestamp": (begin + timedelta(minutes=minutes)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            })
+        day += timedelta(days=1)
+    return executions
+
+
+def tenant_size(tenant):
+    return {key: len(items) for key, items in tenant.items()} | {
+        "triggers": sum(len(s["triggers"]) for s in tenant["schedules"])}
+
+
+# =============================
+# 🌐 SERVEUR
+# =============================
+class MockTMCHandler(BaseHTTPRequestHandler):
+    """Handler HTTP ; tenant, latence et options lus sur l'instance du serveur."""
+
+    def log_message(self, *args):
+        pass
+
+    def _items(self, path, query):
+        tenant = self.server.tenant
+        env_id, ws_id = query.get("environmentId"), query.get("workspaceId")
+        if path == "/orchestration/projects":
+            return tenant["projects"]
+        if path == "/orchestration/workspaces":
+            return tenant["workspaces"]
+        if path == "/orchestration/artifacts":
+            return self.server.index("artifacts", "workspace", ws_id)
+        if path in ("/orchestration/schedules", "/orchestration/executables/tasks",
+                    "/orchestration/executables/plans"):
+            return self.server.index(path.rsplit("/", 1)[-1], "environmentId", env_id)
+        match = _RE_EXECUTIONS.match(path)
+        if match:
+            now = datetime.now(timezone.utc)
+            return synthetic_executions(
+                match.group(2),
+                query.get("from") or (now - timedelta(days=7)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                query.get("to") or now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            )
+        return None
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+        if server.error_rate and random.random() < server.error_rate:
+            return self._send(503, {"message": "Service temporarily unavailable"})
+
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        items = self._items(url.path, query)
+        if items is None:
+            return self._send(404, {"message": f"Unknown endpoint {url.path}"})
+        offset = int(query.get("offset", 0))
+        limit = int(query.get("limit", DEFAULT_LIMIT))
+        body = {"items": items[offset:offset + limit]}
+        if server.total:
+            body["total"] = len(items)
+        self._send(200, body)
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MockTMCServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, tenant, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, total=True):
+        super().__init__((host, port), MockTMCHandler)
+        self.tenant = tenant
+        self.latency, self.jitter, self.error_rate, self.total = latency, jitter, error_rate, total
+        self.lock = threading.Lock()
+        self.requests = 0
+        self._indexes = {}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def index(self, collection, field, value):
+        """Éléments de `collection` dont `field` (ou field.id) vaut `value`, index construit au premier appel."""
+        key = (collection, field)
+        with self.lock:
+            if key not in self._indexes:
+                groups = {}
+                for item in self.tenant[collection]:
+                    ref = item.get(field)
+                    groups.setdefault(ref.get("id") if isinstance(ref, dict) else ref, []).append(item)
+                self._indexes[key] = groups
+        return self._indexes[key].get(value, [])
+
+
+def serve(tenant, host="127.0.0.1", port=0, **options):
+    """Démarre le serveur dans un thread démon et le renvoie (`server.url`, `server.shutdown()`)."""
+    server = MockTMCServer(tenant, host, port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--environments", type=int, default=4)
+    parser.add_argument("--workspaces", type=int, default=40)
+    parser.add_argument("--tasks", type=int, default=50, help="tasks par workspace")
+    parser.add_argument("--plans", type=int, default=5, help="plans par workspace")
+    parser.add_argument("--triggers", type=int, default=2, help="triggers max par schedule")
+    parser.add_argument("--latency", type=float, default=0.05, help="latence fixe par requête (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="latence aléatoire additionnelle (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="part de réponses 503")
+    parser.add_argument("--no-total", action="store_true", help="ne pas renvoyer `total` dans les pages")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    tenant = synthetic_tenant(args.environments, args.workspaces, args.tasks, args.plans, args.triggers,
+                              seed=args.seed)
+    server = MockTMCServer(tenant, args.host, args.port, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, total=not args.no_total)
+    print(f"🧪 Mock TMC sur {server.url} — {tenant_size(tenant)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Aucun appel réel : ni token, ni cache disque partagé avec les exports
+os.environ.setdefault("TMC_TOKEN", "tests")
+os.environ["TMC_CACHE"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
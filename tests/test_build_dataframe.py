@@ -0,0 +1,107 @@
+"""build_dataframe : sortie de la version d'origine et mêmes lignes qu'iter_schedule_rows.
+
+data/build_dataframe_golden.json contient 8 tenants synthétiques perturbés
+(entrées complètes) et les lignes produites par le build_dataframe d'origine
+de TMC_schedule.py, avant la colonne « ID exécutable ».
+"""
+import copy
+import json
+import random
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import mock_tmc_api
+import TMC_schedule as tmc
+
+
+def _perturb(tenant, seed):
+    """Cas limites de l'API : clés absentes, valeurs nulles, exécutables orphelins, doublons."""
+    rnd = random.Random(seed)
+    tenant = copy.deepcopy(tenant)
+    for art in tenant["artifacts"]:
+        r = rnd.random()
+        if r < 0.1:
+            del art["workspace"]
+        elif r < 0.2:
+            art["workspace"] = None
+        elif r < 0.3:
+            art["workspace"]["environment"] = None
+        elif r < 0.35:
+            del art["name"]
+    for task in tenant["tasks"]:
+        r = rnd.random()
+        if r < 0.1:
+            del task["taskPauseDetails"]
+        elif r < 0.15:
+            task["artifactId"] = "art-inconnu"
+        elif r < 0.2:
+            task["executable"] = task.pop("id")
+        elif r < 0.25:
+            del task["artifactId"]
+    for plan in tenant["plans"]:
+        if rnd.random() < 0.2:
+            del plan["planPauseDetails"]
+    for sched in tenant["schedules"]:
+        r = rnd.random()
+        if r < 0.05:
+            del sched["triggers"]
+        elif r < 0.1:
+            sched["triggers"].append({"type": "CRON"})
+        elif r < 0.12:
+            sched["executableId"] = "exe-inconnu"
+    tenant["schedules"].extend(copy.deepcopy(rnd.sample(tenant["schedules"], 5)))
+    return tenant
+
+
+GOLDEN = json.loads((Path(__file__).parent / "data" / "build_dataframe_golden.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=[f"seed{c['seed']}" for c in GOLDEN])
+def test_same_output_as_original(case):
+    df = tmc.build_dataframe(*case["inputs"].values())
+
+    assert list(df.columns) == case["columns"] + ["ID exécutable"]
+    expected = pd.DataFrame(case["rows"], columns=case["columns"])
+    pd.testing.assert_frame_equal(df.drop(columns=["ID exécutable"]), expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_build_dataframe_matches_iter_schedule_rows(seed):
+    tenant = _perturb(mock_tmc_api.synthetic_tenant(workspaces=4, tasks=30, plans=3, seed=seed), seed)
+    project_map = {w["id"]: w["name"].upper() for w in tenant["workspaces"]}
+    args = (tenant["artifacts"], tenant["schedules"], tenant["tasks"], tenant["plans"], "ws-00000", project_map)
+
+    expected = pd.DataFrame(list(tmc.iter_schedule_rows(*args)))
+    df = tmc.build_dataframe(*args)
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert list(df.columns) == list(tmc.SCHEDULE_COLUMNS)
+
+
+def test_join_rules():
+    artifacts = [{"id": "a1", "name": "j_load", "workspace": {"id": "ws1", "environment": {"name": "PROD"}}}]
+    tasks = [
+        {"id": "t1", "name": "LOAD", "artifactId": "a1", "taskPauseDetails": {"pause": True}},
+        {"id": "t2", "name": "ORPHAN", "artifactId": "absent"},
+    ]
+    plans = [{"id": "p1", "name": "NIGHTLY"}]
+    schedules = [
+        {"executableId": "t1", "triggers": [{"cronExpression": "0 2 ? * *"}]},
+        {"executableId": "t2", "triggers": [{"cronExpression": "0 3 ? * *"}]},
+        {"executableId": "p1", "triggers": [{"cronExpression": "0 4 ? * *"}, {}]},
+    ]
+    df = tmc.build_dataframe(artifacts, schedules, tasks, plans, "ws-courant", {"ws1": "DATA"})
+
+    assert df["Nom"].tolist() == ["LOAD", "NIGHTLY", "NIGHTLY"]
+    assert df["Statut"].tolist() == [tmc.STATUS_PAUSED, tmc.STATUS_PLANNED, tmc.STATUS_MANUAL]
+    assert df["Projet"].tolist() == ["DATA", "Inconnu", "Inconnu"]
+    assert df["Workspace"].tolist() == ["ws1", "ws-courant", "ws-courant"]
+    assert df["Job / Artefact"].tolist() == ["j_load", "", ""]
+    assert df["Environnement"].tolist() == ["PROD", "", ""]
+    assert df["Heure"].tolist()[:2] == [2, 4]
+
+
+def test_empty_workspace():
+    assert tmc.build_dataframe([], [], [], [], "ws", {}).empty
@@ -0,0 +1,50 @@
+"""Onglet Collisions : groupes de triggers bornés, noms listés et concurrence estimée."""
+import random
+from datetime import date
+
+import pandas as pd
+
+import TMC_schedule as tmc
+
+START = date(2026, 1, 5)
+
+
+def _frame(rows):
+    return pd.DataFrame([{"Nom": name, "Expression CRON": cron, "Statut": tmc.STATUS_PLANNED, "Environnement": env}
+                         for name, cron, env in rows])
+
+
+def test_group_keeps_only_first_names():
+    rng = random.Random(7)
+    names = [f"JOB_{rng.randrange(500):03d}" for _ in range(400)]
+    group = tmc.TriggerGroup()
+    for name in names:
+        group.add(name)
+    assert group.count == 400
+    assert group.names == sorted(names)[:tmc.MAX_TASKS_LISTED]
+
+
+def test_peak_lists_first_names_and_remaining_count():
+    names = [f"JOB_{i:03d}" for i in range(120)]
+    rows = [(n, "0 2 ? * *" if i % 2 else "0 2 ? * MON-FRI", "PROD") for i, n in enumerate(names)]
+    report = tmc.collision_report(_frame(rows), top_n=1, start=START)
+    listed = report.loc[0, "Tâches"]
+    assert report.loc[0, "Déclenchements"] == 120
+    assert listed == ", ".join(names[:tmc.MAX_TASKS_LISTED]) + f", … (+{120 - tmc.MAX_TASKS_LISTED})"
+
+
+def test_estimated_concurrency_sums_known_durations():
+    rows = [("A", "0 2 ? * *", "PROD"), ("B", "0 2 ? * *", "PROD"), ("C", "30 1 ? * *", "PROD"),
+            ("D", "0 2 ? * *", "PROD")]
+    report = tmc.collision_report(_frame(rows), top_n=1, durations={"A": 10, "B": 10, "C": 45}, start=START)
+    # À 02h00 : A, B et D démarrent (D sans durée connue), C tourne depuis 01h30
+    assert report.loc[0, "Déclenchements"] == 3
+    assert report.loc[0, "Concurrence estimée"] == 3
+
+
+def test_top_n_is_per_environment():
+    rows = [(f"P{i}", f"{i} 2 ? * *", "PROD") for i in range(20)] * 5 + [("D", "0 4 ? * *", "DEV")]
+    report = tmc.collision_report(_frame(rows), top_n=3, start=START)
+    assert list(report["Environnement"]) == ["DEV"] * 3 + ["PROD"] * 3
+    assert list(report["Rang"]) == [1, 2, 3] * 2
+    assert set(report.loc[report["Environnement"] == "DEV", "Déclenchements"]) == {1}
@@ -0,0 +1,67 @@
+"""http_get : reprises sur erreurs transitoires et respect de Retry-After."""
+import pytest
+import requests
+
+import TMC_schedule as tmc
+
+
+def _response(status, body=b"{}", headers=None):
+    resp = requests.Response()
+    resp.status_code, resp._content = status, body
+    resp.headers.update(headers or {})
+    return resp
+
+
+class _Session:
+    """Session scriptée : chaque GET renvoie (ou lève) l'élément suivant."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def get(self, url, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(tmc, "RATE_LIMITER", tmc.TokenBucket(0))
+    monkeypatch.setattr(tmc.time, "sleep", delays.append)
+    return delays
+
+
+def _get(monkeypatch, *outcomes):
+    session = _Session(*outcomes)
+    monkeypatch.setattr(tmc, "_session", lambda: session)
+    return tmc.http_get("https://tmc.test/items")
+
+
+def test_broken_transfer_is_retried(monkeypatch, sleeps):
+    broken = requests.exceptions.ChunkedEncodingError("Connection broken: IncompleteRead")
+    assert _get(monkeypatch, broken, _response(200, b'{"items": [1]}')) == {"items": [1]}
+    assert len(sleeps) == 1
+
+
+def test_truncated_json_body_is_retried(monkeypatch, sleeps):
+    assert _get(monkeypatch, _response(200, b'{"items": [1'), _response(200, b'{"items": []}')) == {"items": []}
+    assert len(sleeps) == 1
+
+
+def test_exhausted_retries_raise(monkeypatch, sleeps):
+    timeouts = [requests.Timeout("lent")] * (tmc.MAX_RETRIES + 1)
+    with pytest.raises(tmc.TMCApiError):
+        _get(monkeypatch, *timeouts)
+
+
+def test_client_error_is_not_retried(monkeypatch, sleeps):
+    assert _get(monkeypatch, _response(404, b"absent")) is None
+    assert sleeps == []
+
+
+def test_retry_after_is_honored_beyond_backoff_cap(monkeypatch, sleeps):
+    throttled = _response(429, b"slow down", {"Retry-After": "120"})
+    assert _get(monkeypatch, throttled, _response(200)) == {}
+    assert sleeps == [120.0]
@@ -0,0 +1,27 @@
+"""Traduction CRON : sorties identiques à l'implémentation d'origine.
+
+data/readable_cron_golden.json contient, pour 2 000 expressions (cas choisis
+à la main et tirage aléatoire à graine fixe parmi les formes Talend), les
+sorties de readable_cron, classify_schedule et hour_from_cron produites par
+la version d'origine de TMC_schedule.py, avant la table de règles précompilées.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from tmc_cron import classify_schedule, hour_from_cron, readable_cron
+
+GOLDEN = json.loads((Path(__file__).parent / "data" / "readable_cron_golden.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("expr, readable, category, hour", GOLDEN, ids=range(len(GOLDEN)))
+def test_same_output_as_original(expr, readable, category, hour):
+    assert readable_cron(expr) == readable
+    assert classify_schedule(readable) == category
+    assert hour_from_cron(expr) == hour
+
+
+def test_uncached_path_matches_cache():
+    for expr, readable, _, _ in GOLDEN[:200]:
+        assert readable_cron.__wrapped__(expr) == readable
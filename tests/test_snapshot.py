@@ -0,0 +1,57 @@
+"""Snapshots et diff : appariement des triggers par contenu."""
+import TMC_schedule as tmc
+
+
+def _row(exec_id, cron, name="LOAD", status=tmc.STATUS_PLANNED):
+    return {"Projet": "DATA", "Workspace": "ws1", "Type exécutable": "TASK", "Nom": name,
+            "Expression CRON": cron, "Statut": status, "Environnement": "PROD", "ID exécutable": exec_id}
+
+
+def _snapshot(*rows):
+    snapshot = tmc.Snapshot()
+    for row in rows:
+        snapshot.add(row)
+    return snapshot
+
+
+def _changes(old, new):
+    table = tmc.diff_snapshots(old, new)["Changements"]
+    return sorted(zip(table["Changement"], table["Avant"], table["Après"]))
+
+
+def test_trigger_inserted_first_is_only_added():
+    old = _snapshot(_row("t1", "0 2 ? * *"), _row("t1", "0 14 ? * *"))
+    new = _snapshot(_row("t1", "0 6 ? * *"), _row("t1", "0 2 ? * *"), _row("t1", "0 14 ? * *"))
+    assert _changes(old, new) == [(tmc.CHANGE_ADDED, "", "0 6 ? * *")]
+
+
+def test_trigger_removed_first_is_only_removed():
+    old = _snapshot(_row("t1", "0 6 ? * *"), _row("t1", "0 2 ? * *"))
+    new = _snapshot(_row("t1", "0 2 ? * *"))
+    assert _changes(old, new) == [(tmc.CHANGE_REMOVED, "0 6 ? * *", "")]
+
+
+def test_changed_expression_is_retimed():
+    old = _snapshot(_row("t1", "0 2 ? * *"), _row("t1", "0 14 ? * *"), _row("t2", "0 3 ? * *"))
+    new = _snapshot(_row("t1", "0 2 ? * *"), _row("t1", "30 14 ? * *"), _row("t2", "0 3 ? * *"))
+    assert _changes(old, new) == [(tmc.CHANGE_RETIMED, "0 14 ? * *", "30 14 ? * *")]
+
+
+def test_pause_resume_and_other_changes():
+    old = _snapshot(_row("t1", "0 2 ? * *"), _row("t2", "0 3 ? * *", status=tmc.STATUS_PAUSED),
+                    _row("t3", "0 4 ? * MON#1"))
+    new = _snapshot(_row("t1", "0 2 ? * *", status=tmc.STATUS_PAUSED), _row("t2", "0 3 ? * *"),
+                    _row("t3", "0 4 ? * MON#1", name="LOAD_V2"))
+    kinds = [kind for kind, _, _ in _changes(old, new)]
+    assert sorted(kinds) == sorted([tmc.CHANGE_PAUSED, tmc.CHANGE_RESUMED, tmc.CHANGE_OTHER])
+    table = tmc.diff_snapshots(old, new)["Changements"]
+    assert set(table["ID exécutable"]) == {"t1", "t2", "t3"}
+
+
+def test_unchanged_duplicates_and_round_trip(tmp_path):
+    rows = [_row("t1", "0 2 ? * *"), _row("t1", "0 2 ? * *"), _row("t2", "")]
+    path = str(tmp_path / "x.snapshot.json.gz")
+    _snapshot(*rows).save(path)
+    loaded = tmc.Snapshot.load(path)
+    assert _changes(loaded, _snapshot(*rows)) == []
+    assert _changes(loaded, _snapshot(*rows[1:])) == [(tmc.CHANGE_REMOVED, "0 2 ? * *", "")]
@@ -0,0 +1,150 @@
+"""Expansion CRON Quartz : caractères spéciaux, plages circulaires, référence brute."""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from tmc_cron import cron_fire_profile, parse_cron
+
+
+def _days(expr, year, month):
+    """Jours du mois où l'expression se déclenche."""
+    start = date(year, month, 1)
+    n = ((start + timedelta(days=32)).replace(day=1) - start).days
+    return [(start + timedelta(days=i)).day for i in parse_cron(expr).matching_days(start, n)]
+
+
+@pytest.mark.parametrize("dom, year, month, expected", [
+    ("L", 2026, 1, [31]),
+    ("L", 2026, 2, [28]),
+    ("L-2", 2026, 1, [29]),
+    ("LW", 2026, 1, [30]),        # le 31 est un samedi
+    ("LW", 2026, 5, [29]),        # le 31 est un dimanche
+    ("LW", 2026, 8, [31]),
+    ("10W", 2026, 1, [9]),        # samedi → vendredi
+    ("11W", 2026, 1, [12]),       # dimanche → lundi
+    ("1W", 2026, 8, [3]),         # samedi 1er → lundi 3, sans passer au mois précédent
+    ("1W", 2026, 2, [2]),
+    ("31W", 2026, 5, [29]),       # dimanche 31 → vendredi 29, sans passer au mois suivant
+    ("30W", 2026, 2, []),
+    ("1,15,L", 2026, 2, [1, 15, 28]),
+    ("10-12", 2026, 1, [10, 11, 12]),
+    ("5/10", 2026, 1, [5, 15, 25]),
+])
+def test_day_of_month(dom, year, month, expected):
+    assert _days(f"0 0 {dom} * ?", year, month) == expected
+
+
+@pytest.mark.parametrize("dow, year, month, expected", [
+    ("6L", 2026, 1, [30]),        # dernier vendredi
+    ("1L", 2026, 1, [25]),        # dernier dimanche
+    ("FRIL", 2026, 5, [29]),
+    ("2#1", 2026, 1, [5]),
+    ("MON#1", 2026, 1, [5]),
+    ("6#5", 2026, 1, [30]),
+    ("2#5", 2026, 1, []),
+    ("L", 2026, 1, [3, 10, 17, 24, 31]),   # L seul = samedi
+    ("FRI-MON", 2026, 1, [2, 3, 4, 5, 9, 10, 11, 12, 16, 17, 18, 19, 23, 24, 25, 26, 30, 31]),
+    ("6-2", 2026, 1, [2, 3, 4, 5, 9, 10, 11, 12, 16, 17, 18, 19, 23, 24, 25, 26, 30, 31]),
+    ("0", 2026, 1, [4, 11, 18, 25]),       # 0 accepté comme dimanche
+    ("2-6/2", 2026, 1, [2, 5, 7, 9, 12, 14, 16, 19, 21, 23, 26, 28, 30]),   # lun, mer, ven
+])
+def test_day_of_week(dow, year, month, expected):
+    assert _days(f"0 0 ? * {dow}", year, month) == expected
+
+
+def test_day_of_month_or_day_of_week():
+    assert _days("0 0 1 * MON", 2026, 1) == [1, 5, 12, 19, 26]
+    assert _days("0 0 L * 6#1", 2026, 1) == [2, 31]
+
+
+def test_month_wrap_around_range_and_names():
+    sched = parse_cron("0 0 1 NOV-FEB ?")
+    assert [m for m in range(1, 13) if sched.months >> m & 1] == [1, 2, 11, 12]
+    assert _days("0 0 1 NOV-FEB ?", 2026, 3) == []
+    assert _days("0 0 1 NOV-FEB ?", 2026, 12) == [1]
+    assert parse_cron("0 0 1 jan,Mar ?").months == parse_cron("0 0 1 1,3 ?").months
+
+
+def test_year_and_seconds_fields():
+    assert _days("0 0 1 * ? 2027", 2026, 1) == []
+    assert _days("0 0 1 * ? 2026-2027", 2026, 1) == [1]
+    profile = cron_fire_profile("0/15 30 8 * * ? *", date(2026, 1, 5), 7)
+    assert profile.total == 4 * 7
+    assert profile.per_hour[8] == 28
+
+
+def test_minute_and_hour_steps():
+    sched = parse_cron("5/20 10/5 * * ?")
+    assert sched.minutes == [5, 25, 45]
+    assert sched.hours == [10, 15, 20]
+    assert parse_cron("*/15 22-2 * * ?").hours == [0, 1, 2, 22, 23]
+
+
+@pytest.mark.parametrize("expr", [
+    "", "   ", "0 0 ? * ?", "61 * * * ?", "0 24 * * ?", "0 0 * *", "0 0 * * FOO",
+    "*/0 * * * ?", "0 0 32 * ?", "0 0 * 13 ?", "0 0 ? * 8", "0 0 ? * MON#6", "1 2 3 4 5 6 7 8",
+])
+def test_invalid_expressions(expr):
+    assert parse_cron(expr) is None
+    assert cron_fire_profile(expr, date(2026, 1, 5), 7) is None
+
+
+# Référence : évaluation naïve, minute par minute, des champs standard
+def _expand(field, lo, hi):
+    values = set()
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        step = int(step or 1)
+        if part == "*":
+            first, last = lo, hi
+        elif "-" in part:
+            first, last = map(int, part.split("-"))
+        else:
+            first = int(part)
+            last = hi if step > 1 else first
+        span = list(range(first, last + 1)) if first <= last else [*range(first, hi + 1), *range(lo, last + 1)]
+        values.update(span[::step])
+    return values
+
+
+def _reference_fires(expr, start, days):
+    minute, hour, dom, month, dow = expr.split()
+    minutes, hours, months = _expand(minute, 0, 59), _expand(hour, 0, 23), _expand(month, 1, 12)
+    doms = None if dom in "*?" else _expand(dom, 1, 31)
+    dows = None if dow in "*?" else {q or 1 for q in _expand(dow, 0, 7)}   # 1 = SUN … 7 = SAT
+    total = 0
+    for i in range(days):
+        d = start + timedelta(days=i)
+        if d.month not in months:
+            continue
+        quartz_dow = (d.weekday() + 1) % 7 + 1
+        hits = [hit for hit in (doms and d.day in doms, dows and quartz_dow in dows) if hit is not None]
+        if hits and not any(hits):
+            continue
+        total += sum(1 for h in range(24) for m in range(60) if h in hours and m in minutes)
+    return total
+
+
+def _random_field(rng, lo, hi):
+    kind = rng.choice(["*", "value", "list", "range", "step", "range_step"])
+    a, b = rng.randint(lo, hi), rng.randint(lo, hi)
+    return {
+        "*": "*",
+        "value": str(a),
+        "list": ",".join(str(v) for v in sorted({a, b, rng.randint(lo, hi)})),
+        "range": f"{a}-{b}",
+        "step": f"{a}/{rng.randint(1, 7)}",
+        "range_step": f"{a}-{b}/{rng.randint(1, 4)}",
+    }[kind]
+
+
+def test_brute_force_reference():
+    rng = random.Random(20260101)
+    start = date(2026, 1, 1)
+    for _ in range(300):
+        dom = rng.choice(["?", "*", _random_field(rng, 1, 31)])
+        dow = "?" if dom != "?" and rng.random() < 0.5 else _random_field(rng, 1, 7)
+        expr = " ".join([_random_field(rng, 0, 59), _random_field(rng, 0, 23), dom,
+                         _random_field(rng, 1, 12), dow])
+        assert cron_fire_profile(expr, start, 400).total == _reference_fires(expr, start, 400), expr
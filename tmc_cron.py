@@ -0,0 +1,487 @@
+"""Lecture, classification et expansion des expressions CRON Talend / Quartz.
+
+Module léger (bibliothèque standard uniquement) : importable par des tests,
+des hooks pre-commit ou d'autres outils sans pandas ni token TMC.
+
+Usage : python tmc_cron.py "<cron>" [...]   (équivalent : TMC_schedule.py translate)
+"""
+import argparse
+import calendar
+import json
+import re
+import sys
+from collections import namedtuple
+from datetime import date, timedelta
+from functools import lru_cache
+
+
+# =============================
+# 🕒 LECTURE CRON (v3.5 améliorée)
+# =============================
+
+def _uniform_step(int_list):
+    """Retourne le pas si la liste a un écart constant, sinon None."""
+    if len(int_list) < 2:
+        return None
+    diffs = [b - a for a, b in zip(int_list, int_list[1:])]
+    return diffs[0] if all(d == diffs[0] for d in diffs) else None
+
+def _dow_label(dow_raw: str) -> str:
+    d = dow_raw.upper().replace(",", ", ")
+    if d in ("1-5", "2-6", "MON-FRI"):
+        return "jours de semaine"
+    if d in ("*", "0-7", "0,1,2,3,4,5,6,7", "0,1,2,3,4,5,6"):
+        return "tous les jours"
+    return d
+
+def _normalize_cron(expr: str) -> str:
+    expr = expr.strip()
+
+    # ----- Normalisation : champ année wildcard (6 champs → 5 champs) -----
+    # ex: "30 4 ? * 2-6 *" → "30 4 ? * 2-6"
+    parts = expr.split()
+    if len(parts) == 6 and parts[-1] in ('*', '?'):
+        expr = ' '.join(parts[:5])
+
+    # ----- Normalisation : dom=* mois=* dow=? → dom=? mois=* dow=* -----
+    # ex: "00 20 * * ?"  /  "3,8,13 * * * ?" → formes gérées par les règles suivantes
+    parts = expr.split()
+    if len(parts) == 5 and parts[2] == '*' and parts[3] == '*' and parts[4] == '?':
+        parts[2] = '?'
+        parts[4] = '*'
+        expr = ' '.join(parts)
+    return expr
+
+
+# ----- Cas spéciaux Talend : fin / jour ouvré de mois -----
+# (présence, exclusion, forme "minute heure <jour> * ?", libellé)
+_CRON_MONTH_DAYS = [
+    # ex. "5 0 L * ?" → le dernier jour du mois à 00:05
+    (re.compile(r"\bL\b"), re.compile(r"\bL[-W]"),
+     re.compile(r"^(\d{1,2})\s+(\d{1,2})\s+L\s+\*\s+\?"), "Le dernier jour du mois"),
+    # ex. "5 0 L-1 * ?" → le dernier jour du mois à 00:05
+    (re.compile(r"\bL-1\b"), None,
+     re.compile(r"^(\d{1,2})\s+(\d{1,2})\s+L-1\s+\*\s+\?"), "Le dernier jour du mois"),
+    # ex. "5 0 LW * ?" → dernier jour ouvré du mois à 00:05
+    (re.compile(r"\bLW\b"), None,
+     re.compile(r"^(\d{1,2})\s+(\d{1,2})\s+LW\s+\*\s+\?"), "Le dernier jour ouvré du mois"),
+    # ex. "5 0 1W * ?" → 1er jour ouvré du mois à 00:05
+    (re.compile(r"\b1W\b"), None,
+     re.compile(r"^(\d{1,2})\s+(\d{1,2})\s+1W\s+\*\s+\?"), "Le 1er jour ouvré du mois"),
+]
+
+
+def _minutes_label(minutes_csv):
+    mins = [int(x) for x in minutes_csv.split(",") if x.isdigit()]
+    step = _uniform_step(sorted(mins))
+    if step and set(mins) == set(range(0, 60, step)):
+        return f"Toutes les {step} min"
+    if step:
+        return f"Chaque {step} min (aux minutes {minutes_csv})"
+    return f"Aux minutes {minutes_csv}"
+
+
+def _cron_every_n_min_range(m):
+    # ----- Toutes les X minutes sur une plage horaire (dow optionnel) -----
+    # ex: "*/15 7-18 ? * 2,3,4,5,6"  /  "*/17 8-19 ? * 2-6"
+    freq, h1, h2, dow = m.groups()
+    h1 = int(h1); h2 = int(h2) if h2 else h1
+    lbl = _dow_label(dow)
+    if lbl == "jours de semaine":
+        return f"Toutes les {int(freq)} min de {h1:02d}h à {h2:02d}h (jours de semaine)"
+    if lbl == "tous les jours":
+        return f"Toutes les {int(freq)} min de {h1:02d}h à {h2:02d}h"
+    return f"Toutes les {int(freq)} min de {h1:02d}h à {h2:02d}h ({lbl})"
+
+
+def _cron_minutes_hour_range(m):
+    # ----- Liste de minutes + plage d'heures -----
+    # ex: "0,30 8-17 ? * 2,3,4,5,6"  → toutes les 30 min 08–17h (jours de semaine)
+    minutes_csv, h1, h2, dow = m.groups()
+    lbl = _dow_label(dow)
+    suffix = "" if lbl in ("tous les jours",) else f" ({lbl})"
+    return f"{_minutes_label(minutes_csv)} de {int(h1):02d}h à {int(h2):02d}h{suffix}"
+
+
+def _cron_minutes_hours(m):
+    # ----- Liste de minutes + liste/plage d'heures (générique) -----
+    # ex: "0,10,20,30,40,50 5,6,7,8,9,10,... ? * *"
+    minutes_csv, hours_field, dow = m.groups()
+    if "-" in hours_field:
+        h1, h2 = [int(x) for x in hours_field.split("-")]
+        hours_lbl = f"de {h1:02d}h à {h2:02d}h"
+    else:
+        hours = [int(h) for h in hours_field.split(",") if h.isdigit()]
+        hours_lbl = "à " + ", ".join(f"{h:02d}h" for h in hours)
+    lbl = _dow_label(dow)
+    suffix = "" if lbl in ("tous les jours",) else f" ({lbl})"
+    return f"{_minutes_label(minutes_csv)} {hours_lbl}{suffix}"
+
+
+def _cron_multi_hours(m):
+    # ----- Multi-heures (minute fixe) -----
+    # ex: "0 9,14,21 ? * *"  /  "15 8,12,16 ? * 1-5"
+    minute, hours_csv, dow = m.groups()
+    hours = [int(h) for h in hours_csv.split(",") if h.isdigit()]
+    hour_str = ", ".join(f"{h:02d}h" for h in hours)
+    lbl = _dow_label(dow)
+    prefix = "Tous les jours" if lbl == "tous les jours" else ("Tous les jours de semaine" if lbl == "jours de semaine" else f"Chaque semaine ({lbl})")
+    return f"{prefix} à {hour_str}{'' if int(minute)==0 else f' ({int(minute)}m)'}"
+
+
+def _cron_single_time(m):
+    # ----- Horaire unique (dow/hebdo) -----
+    # ex: "20 5 ? * 2-6" / "0 2 ? * *"
+    minute, hour, dow = m.groups()
+    lbl = _dow_label(dow)
+    if lbl == "jours de semaine":
+        return f"Tous les jours de semaine à {int(hour):02d}h{int(minute):02d}"
+    if lbl == "tous les jours":
+        return f"Tous les jours à {int(hour):02d}h{int(minute):02d}"
+    return f"Chaque semaine ({lbl}) à {int(hour):02d}h{int(minute):02d}"
+
+
+def _cron_month_days(m):
+    # ----- Jours du mois + mois (exécutions mensuelles/annuelles) -----
+    # ex: "00 8 1-31 1-12 ?" / "10 8 1-31 1-12 ?" / "00 10 29 3,6,9,12 ? *"
+    minute, hour, dom, months = m.groups()
+    if months in ("*", "1-12"):
+        return f"Chaque mois, jours {dom}, à {int(hour):02d}h{int(minute):02d}"
+    return f"Jours {dom} des mois {months} à {int(hour):02d}h{int(minute):02d}"
+
+
+def _cron_simple_recurrence(m):
+    # ----- Récurrences simples sans plage -----
+    # ex: "*/5 * * * * ?" / "*/10 * * * * ?"
+    if "?" not in m.string:
+        return None
+    return f"Toutes les {int(m.group(1))} minutes"
+
+
+# Table ordonnée (méthode de recherche compilée, traducteur) : la première règle
+# dont l'expression correspond et dont le traducteur renvoie un texte l'emporte.
+_CRON_RULES = [
+    (re.compile(r"^\*/(\d+)\s+(\d{1,2})(?:-(\d{1,2}))?\s+\?\s+\*\s+([0-9A-Z,\-*]+)$").match, _cron_every_n_min_range),
+    (re.compile(r"^([\d,]+)\s+(\d{1,2})-(\d{1,2})\s+\?\s+\*\s+([0-9A-Z,\-*]+)$").match, _cron_minutes_hour_range),
+    (re.compile(r"^([\d,]+)\s+([\d,\-]+)\s+\?\s+\*\s+([0-9A-Z,\-*]+)$").match, _cron_minutes_hours),
+    (re.compile(r"^(\d{1,2})\s+([\d,]+)\s+\?\s+\*\s+([0-9A-Z,\-*]+)$").match, _cron_multi_hours),
+    (re.compile(r"^(\d{1,2})\s+(\d{1,2})\s+\?\s+\*\s+([0-9A-Z,\-*]+)$").match, _cron_single_time),
+    (re.compile(r"^(\d{1,2})\s+(\d{1,2})\s+([\d,\-]+)\s+([\d,\-*]+)\s+\?\s*\*?$").match, _cron_month_days),
+    (re.compile(r"\*/(\d+)").search, _cron_simple_recurrence),
+]
+
+
+@lru_cache(maxsize=4096)
+def readable_cron(expr: str) -> str:
+    if not expr:
+        return ""
+    expr = _normalize_cron(expr)
+
+    for present, excluded, at_time, label in _CRON_MONTH_DAYS:
+        if present.search(expr) and not (excluded and excluded.search(expr)):
+            m = at_time.match(expr)
+            if m:
+                minute, hour = map(int, m.groups())
+                return f"{label} à {hour:02d}h{minute:02d}"
+            return label
+
+    for find, translate in _CRON_RULES:
+        m = find(expr)
+        if m:
+            desc = translate(m)
+            if desc is not None:
+                return desc
+
+    # ----- Fallback : on remonte l’expression pour debug -----
+    return f"(CRON: {expr})"
+
+# =============================
+# 🔢 CLASSIFICATION
+# =============================
+_RE_EVERY_N_MIN = re.compile(r"toutes les \d+ min")
+_RE_LEADING_INT = re.compile(r"(\d+)")
+
+
+@lru_cache(maxsize=4096)
+def classify_schedule(desc):
+    dl = desc.lower()
+    if "5 min" in dl:
+        return "Every 5min"
+    if "10 min" in dl:
+        return "Every 10min"
+    if _RE_EVERY_N_MIN.search(dl):
+        return "Recurring"
+    if "aux minutes" in dl or ("chaque" in dl and "min" in dl):
+        return "Recurring"
+    if "mois" in dl or "mensuel" in dl:
+        return "Monthly"
+    if "tous les jours" in dl or "quotidien" in dl:
+        return "Daily"
+    if "semaine" in dl:
+        return "Weekly"
+    return "Others"
+
+
+@lru_cache(maxsize=4096)
+def hour_from_cron(expr):
+    try:
+        parts = expr.strip().split()
+        if len(parts) >= 2:
+            h = parts[1]
+            m = _RE_LEADING_INT.match(h)
+            if m:
+                return int(m.group(1))
+    except Exception:
+        pass
+    return None
+
+
+# =============================
+# 🧮 EXPANSION CRON (dialecte Quartz / Talend)
+# =============================
+# Champs : minute heure jour-du-mois mois jour-de-semaine [année]
+# (7 champs = secondes en tête, comme Quartz). Jours de semaine Quartz :
+# 1 = SUN … 7 = SAT (0 accepté comme SUN). Chaque champ devient un bitset
+# (entier Python) ; l'expansion ne boucle que sur les jours de l'horizon.
+AFFLUENCE_DAYS = 7          # horizon par défaut : une semaine à partir du lundi
+WEEKDAYS = ["Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim"]
+
+_MONTH_NAMES = {n: i for i, n in enumerate(
+    ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"], start=1)}
+_DOW_NAMES = {n: i for i, n in enumerate(["SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"], start=1)}
+_RE_DOM_NEAREST = re.compile(r"^(\d{1,2})W$")
+_RE_DOM_LAST = re.compile(r"^L(?:-(\d{1,2}))?$")
+_RE_DOW_LAST = re.compile(r"^(\w+)L$")
+_RE_DOW_NTH = re.compile(r"^(\w+)#([1-5])$")
+
+FireProfile = namedtuple("FireProfile", "total per_hour per_weekday per_weekday_hour")
+
+
+def _cron_value(token, lo, hi, names):
+    value = names[token] if names and token in names else int(token)
+    if not lo <= value <= hi:
+        raise ValueError(f"valeur hors bornes : {token}")
+    return value
+
+
+def _cron_field(field, lo, hi, names=None):
+    """Traduit un champ CRON (listes, plages, pas, noms) en bitset."""
+    mask = 0
+    for part in field.upper().split(","):
+        step = 1
+        if "/" in part:
+            part, step_txt = part.split("/", 1)
+            step = int(step_txt)
+            if step <= 0:
+                raise ValueError(f"pas invalide : {field}")
+        if part in ("*", "?"):
+            first, last = lo, hi
+        elif "-" in part:
+            first, last = (_cron_value(x, lo, hi, names) for x in part.split("-", 1))
+        else:
+            first = _cron_value(part, lo, hi, names)
+            last = hi if step > 1 else first
+        span = range(first, last + 1) if first <= last else [*range(first, hi + 1), *range(lo, last + 1)]
+        for v in list(span)[::step]:
+            mask |= 1 << v
+    return mask
+
+
+def _bits(mask):
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+def _quartz_to_weekday(q):
+    """1 = SUN … 7 = SAT (0 = SUN) → 0 = lundi … 6 = dimanche."""
+    return (q + 5) % 7 if q else 6
+
+
+class CronSchedule:
+    """Expression CRON Quartz/Talend compilée en bitsets."""
+
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) == 7:
+            self.seconds = _cron_field(fields.pop(0), 0, 59).bit_count()
+        else:
+            self.seconds = 1
+        if len(fields) not in (5, 6):
+            raise ValueError(f"nombre de champs inattendu : {expr!r}")
+        minute, hour, dom, month, dow = fields[:5]
+        year = fields[5] if len(fields) == 6 else "*"
+
+        self.minutes = _bits(_cron_field(minute, 0, 59))
+        self.hours = _bits(_cron_field(hour, 0, 23))
+        self.months = _cron_field(month, 1, 12, _MONTH_NAMES)
+        self.years = None if year in ("*", "?") else _cron_field(year, 1970, 2199)
+        self.dom_any = dom in ("*", "?")
+        self.dow_any = dow in ("*", "?")
+        if dom == "?" and dow == "?":
+            raise ValueError(f"jour du mois et de semaine tous deux '?' : {expr!r}")
+
+        # Jour du mois : jours fixes + L, L-n, LW, nW
+        self.dom_mask, self.dom_last, self.dom_last_weekday, self.dom_nearest = 0, [], False, []
+        for part in ([] if self.dom_any else dom.upper().split(",")):
+            if part == "LW":
+                self.dom_last_weekday = True
+            elif _RE_DOM_LAST.match(part):
+                self.dom_last.append(int(_RE_DOM_LAST.match(part).group(1) or 0))
+            elif _RE_DOM_NEAREST.match(part):
+                self.dom_nearest.append(_cron_value(_RE_DOM_NEAREST.match(part).group(1), 1, 31, None))
+            else:
+                self.dom_mask |= _cron_field(part, 1, 31)
+
+        # Jour de semaine : jours fixes + nL (dernier x du mois), n#k (k-ième x du mois)
+        self.dow_mask, self.dow_last, self.dow_nth = 0, [], []
+        for part in ([] if self.dow_any else dow.upper().split(",")):
+            if part == "L":
+                part = "7"
+            m_last, m_nth = _RE_DOW_LAST.match(part), _RE_DOW_NTH.match(part)
+            if m_last:
+                self.dow_last.append(_quartz_to_weekday(_cron_value(m_last.group(1), 0, 7, _DOW_NAMES)))
+            elif m_nth:
+                wd = _quartz_to_weekday(_cron_value(m_nth.group(1), 0, 7, _DOW_NAMES))
+                self.dow_nth.append((wd, int(m_nth.group(2))))
+            else:
+                for q in _bits(_cron_field(part, 0, 7, _DOW_NAMES)):
+                    self.dow_mask |= 1 << _quartz_to_weekday(q)
+
+    @property
+    def fires_per_day(self):
+        return len(self.minutes) * len(self.hours) * self.seconds
+
+    def _dom_matches(self, d, last):
+        if self.dom_mask >> d.day & 1 or any(d.day == last - off for off in self.dom_last):
+            return True
+        if self.dom_last_weekday:
+            wd_last = date(d.year, d.month, last).weekday()
+            if d.day == last - max(0, wd_last - 4):
+                return True
+        for n in self.dom_nearest:
+            if n > last:
+                continue
+            wd = date(d.year, d.month, n).weekday()
+            if wd == 5:
+                target = n - 1 if n > 1 else n + 2
+            elif wd == 6:
+                target = n + 1 if n < last else n - 2
+            else:
+                target = n
+            if d.day == target:
+                return True
+        return False
+
+    def _dow_matches(self, d, last):
+        wd = d.weekday()
+        if self.dow_mask >> wd & 1:
+            return True
+        if wd in self.dow_last and d.day + 7 > last:
+            return True
+        return (wd, (d.day - 1) // 7 + 1) in self.dow_nth
+
+    def day_matches(self, d):
+        if not self.months >> d.month & 1:
+            return False
+        if self.years is not None and not self.years >> d.year & 1:
+            return False
+        if self.dom_any and self.dow_any:
+            return True
+        last = calendar.monthrange(d.year, d.month)[1]
+        if self.dow_any:
+            return self._dom_matches(d, last)
+        if self.dom_any:
+            return self._dow_matches(d, last)
+        return self._dom_matches(d, last) or self._dow_matches(d, last)
+
+    def matching_days(self, start, days):
+        """Décalages (en jours depuis `start`) des jours où l'expression se déclenche."""
+        return [i for i in range(days) if self.day_matches(start + timedelta(days=i))]
+
+
+@lru_cache(maxsize=4096)
+def parse_cron(expr):
+    """CronSchedule de l'expression, ou None si elle n'est pas interprétable."""
+    try:
+        return CronSchedule(expr.strip()) if expr and expr.strip() else None
+    except (ValueError, KeyError):
+        return None
+
+
+def week_start(today=None):
+    """Lundi de la semaine courante (début d'horizon par défaut)."""
+    today = today or date.today()
+    return today - timedelta(days=today.weekday())
+
+
+@lru_cache(maxsize=4096)
+def cron_fire_profile(expr, start, days=AFFLUENCE_DAYS):
+    """Nombre exact de déclenchements sur [start, start + days[.
+
+    Renvoie un FireProfile (total, par heure, par jour de semaine, par jour de
+    semaine × heure), ou None si l'expression n'est pas interprétable.
+    """
+    sched = parse_cron(expr)
+    if sched is None:
+        return None
+    per_weekday = [0] * 7
+    for offset in sched.matching_days(start, days):
+        per_weekday[(start + timedelta(days=offset)).weekday()] += 1
+    n_days = sum(per_weekday)
+    per_minute = len(sched.minutes) * sched.seconds
+
+    per_hour = [0] * 24
+    per_weekday_hour = [[0] * 24 for _ in range(7)]
+    for h in sched.hours:
+        per_hour[h] = per_minute * n_days
+        for wd in range(7):
+            per_weekday_hour[wd][h] = per_minute * per_weekday[wd]
+    return FireProfile(
+        total=sched.fires_per_day * n_days,
+        per_hour=tuple(per_hour),
+        per_weekday=tuple(n * sched.fires_per_day for n in per_weekday),
+        per_weekday_hour=tuple(tuple(r) for r in per_weekday_hour),
+    )
+
+
+
+# =============================
+# 🔤 TRADUCTION EN LIGNE DE COMMANDE
+# =============================
+def translate(expr, start=None):
+    """Traduction complète d'une expression : description, catégorie, heure, déclenchements sur une semaine."""
+    profile = cron_fire_profile(expr, start or week_start())
+    description = readable_cron(expr)
+    return {
+        "expression": expr,
+        "description": description,
+        "categorie": classify_schedule(description),
+        "heure": hour_from_cron(expr),
+        "declenchements_semaine": profile.total if profile else None,
+    }
+
+
+def translate_main(argv=None):
+    """Sous-commande `translate` ; code retour 1 si une expression n'est pas interprétable."""
+    parser = argparse.ArgumentParser(prog="translate", description="Traduit des expressions CRON Talend / Quartz.")
+    parser.add_argument("expressions", nargs="+", metavar="CRON", help="expression(s) CRON, entre guillemets")
+    parser.add_argument("--json", action="store_true", help="une ligne JSON par expression")
+    args = parser.parse_args(argv)
+
+    invalid = 0
+    for expr in args.expressions:
+        result = translate(expr)
+        invalid += result["declenchements_semaine"] is None
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False))
+        else:
+            details = [result["categorie"]]
+            if result["heure"] is not None:
+                details.append(f"{result['heure']}h")
+            fires = result["declenchements_semaine"]
+            details.append("expression non interprétable" if fires is None else f"{fires} déclenchement(s) / semaine")
+            print(f"{expr}\n  {result['description']}\n  {' – '.join(details)}")
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(translate_main())